@@ -0,0 +1,127 @@
+"""
+Native async versions of the hottest read endpoints, under ``/api/async/``:
+the menu list and detail, the caller's cart and their order history.
+
+They return the same JSON as the DRF views, but no request holds a worker
+thread while it waits: authentication, the menu cache and every query go
+through Django's async cache and ORM APIs (``aget``, ``afirst``, ``async
+for``). Django still runs each query on its shared sync thread, so a warm
+menu-cache hit gains the most and a query-bound page the least. DRF has no
+async views, so these are plain Django views that reuse its serializers,
+paginators and exception handler.
+
+Only worth it behind an ASGI server (``uvicorn pizza_delivery.asgi:application``);
+under WSGI Django runs each one in its own event loop.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from . import menu_cache
+from .authentication import StatelessRoleAuthentication
+from .cart import CartSerializer, cart_with_totals
+from .models import Cart, Order, Pizza
+from .pagination import MenuPagination, OrderPagination
+from .serializers import OrderSerializer, PizzaSerializer
+from .throttling import AnonMenuThrottle, LocalBucketStore, get_store
+from .views import filter_menu
+
+
+def _json(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+
+def async_api_view(view):
+    """Turn DRF exceptions (and Http404) into the responses an APIView would give."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except (APIException, Http404) as exc:
+            handled = exception_handler(exc, {'request': request})
+            response = _json(handled.data, handled.status_code)
+            for header, value in handled.items():
+                response[header] = value
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response['WWW-Authenticate'] = StatelessRoleAuthentication().authenticate_header(request)
+            return response
+    return wrapper
+
+
+async def _authenticate(request, required=True):
+    result = await StatelessRoleAuthentication().aauthenticate(request)
+    if result is None and required:
+        raise NotAuthenticated()
+    # Replaces the session user AuthenticationMiddleware left, which would
+    # need a sync query to resolve.
+    request.user = result[0] if result else AnonymousUser()
+    return request.user
+
+
+async def _throttle(request, throttle):
+    # The local store is a dict update under a lock; only the shared cache
+    # store does I/O worth moving off the loop.
+    if isinstance(get_store(), LocalBucketStore):
+        allowed = throttle.allow_request(request, None)
+    else:
+        allowed = await sync_to_async(throttle.allow_request)(request, None)
+    if not allowed:
+        raise Throttled(wait=throttle.wait())
+
+
+async def _paginated(paginator, queryset, serializer_class, request):
+    drf_request = Request(request)
+    page = await paginator.apaginate_queryset(queryset, drf_request)
+    data = serializer_class(page, many=True, context={'request': drf_request}).data
+    return paginator.get_paginated_response(data).data
+
+
+@require_safe
+@async_api_view
+async def menu_list(request):
+    """``GET /api/async/pizzas/``: same filters, pages and cache invalidation as ``/api/pizzas/``."""
+    await _authenticate(request, required=False)
+    await _throttle(request, AnonMenuThrottle())
+    key, entry = await menu_cache.aget_entry(request)
+    if entry is None:
+        pizzas = filter_menu(Pizza.objects.all(), Request(request).query_params)
+        data = await _paginated(MenuPagination(), pizzas, PizzaSerializer, request)
+        entry = await menu_cache.astore_entry(key, data)
+    return menu_cache.finalize(request, _json(entry['data']), entry)
+
+
+@require_safe
+@async_api_view
+async def menu_detail(request, pk):
+    await _authenticate(request, required=False)
+    await _throttle(request, AnonMenuThrottle())
+    pizza = await aget_object_or_404(Pizza, pk=pk)
+    return _json(PizzaSerializer(pizza).data)
+
+
+@require_safe
+@async_api_view
+async def cart_detail(request):
+    user = await _authenticate(request)
+    cart = await cart_with_totals().filter(user_id=user.id).afirst()
+    if cart is None:
+        await Cart.objects.aget_or_create(user_id=user.id)
+        cart = await cart_with_totals().aget(user_id=user.id)
+    return _json(CartSerializer(cart).data)
+
+
+@require_safe
+@async_api_view
+async def order_history(request):
+    user = await _authenticate(request)
+    orders = Order.objects.filter(user_id=user.id).prefetch_related('items')
+    return _json(await _paginated(OrderPagination(), orders, OrderSerializer, request))
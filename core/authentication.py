@@ -0,0 +1,153 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser
+
+ROLE_CLAIM = 'role'
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def _token_version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def _token_version_timeout():
+    # Bounds how long another worker can keep accepting a revoked token when
+    # the default cache is per-process (no REDIS_URL).
+    return getattr(settings, 'TOKEN_VERSION_CACHE_TIMEOUT', 30)
+
+
+def get_token_version(user_id):
+    """Current token version for ``user_id``; hits the DB only on a cache miss."""
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (CustomUser.objects.filter(pk=user_id)
+                   .values_list('token_version', flat=True).first())
+        if version is not None:
+            cache.set(key, version, timeout=_token_version_timeout())
+    return version
+
+
+async def aget_token_version(user_id):
+    key = _token_version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await (CustomUser.objects.filter(pk=user_id)
+                         .values_list('token_version', flat=True).afirst())
+        if version is not None:
+            await cache.aset(key, version, timeout=_token_version_timeout())
+    return version
+
+
+def revoke_tokens(user_id):
+    """
+    Invalidate every token issued to ``user_id`` so far (logout-all, ban).
+    Role, ``is_active`` and password changes call it from core.signals.
+    """
+    CustomUser.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    key = _token_version_key(user_id)
+    cache.delete(key)
+    # Again once committed, in case a request re-cached the old version meanwhile.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ROLE_CLAIM] = user.role
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        token['username'] = user.username
+        return token
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses refresh tokens from before a revocation and stamps the user's
+    current role on the new access token instead of copying the old claim.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        current = (CustomUser.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM))
+                   .values_list('role', 'token_version').first())
+        if current is None or refresh.get(TOKEN_VERSION_CLAIM) != current[1]:
+            raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+        refresh[ROLE_CLAIM] = current[0]
+        return super().validate({**attrs, 'refresh': str(refresh)})
+
+
+class RoleTokenUser(TokenUser):
+    """Request user built from access-token claims; carries ``role`` without a DB row."""
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the claim as a string; CustomUser keys are integers.
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def role(self):
+        return self.token.get(ROLE_CLAIM, '')
+
+
+class StatelessRoleAuthentication(JWTAuthentication):
+    """
+    Authenticates from the token claims alone and returns a ``RoleTokenUser``.
+
+    Views that need the real ``CustomUser`` row (password changes, account
+    edits) set ``db_user_lookup = True``; setting ``JWT_STATELESS_AUTH = False``
+    turns the DB lookup back on everywhere.
+    """
+
+    def authenticate(self, request):
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        self.db_lookup = (not getattr(settings, 'JWT_STATELESS_AUTH', True)
+                          or getattr(view, 'db_user_lookup', False))
+        return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views, which have no DRF view to opt in from."""
+        self.db_lookup = not getattr(settings, 'JWT_STATELESS_AUTH', True)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def _check_version(self, validated_token, version):
+        if validated_token.get(TOKEN_VERSION_CLAIM) != version:
+            raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+
+    def _user_id(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+        return validated_token[api_settings.USER_ID_CLAIM]
+
+    def get_user(self, validated_token):
+        self._check_version(validated_token, get_token_version(self._user_id(validated_token)))
+        if self.db_lookup:
+            return super().get_user(validated_token)
+        return RoleTokenUser(validated_token)
+
+    async def aget_user(self, validated_token):
+        self._check_version(validated_token, await aget_token_version(self._user_id(validated_token)))
+        if self.db_lookup:
+            return await sync_to_async(super().get_user)(validated_token)
+        return RoleTokenUser(validated_token)
@@ -1,19 +1,92 @@
+from .middleware import TimedSerializerMixin
 from .models import Cart, CartItem, Pizza
 from rest_framework import serializers
 
 class CartItemSerializer(serializers.ModelSerializer):
     pizza = serializers.StringRelatedField()  # shows pizza name instead of ID
+    pizza_id = serializers.IntegerField(read_only=True)
+    unit_price = serializers.DecimalField(source='pizza.price', max_digits=6, decimal_places=2, read_only=True)
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = CartItem
-        fields = ['id', 'pizza', 'quantity']
+        fields = ['id', 'pizza', 'pizza_id', 'quantity', 'unit_price', 'subtotal']
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True)
+    total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     
     class Meta:
         model = Cart
-        fields = ['id', 'created_at', 'items']
+        fields = ['id', 'created_at', 'items', 'total']
+
+class CartAddSerializer(serializers.Serializer):
+    pizza_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class CartBulkAddSerializer(serializers.Serializer):
+    items = CartAddSerializer(many=True, allow_empty=False)
+
+#SERVICE
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Prefetch, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+
+
+def cart_with_totals():
+    """
+    Carts with ``total`` annotated and ``items`` prefetched (pizza joined,
+    ``subtotal`` annotated). Reading one cart costs two queries, whatever its size.
+    """
+    subtotal = ExpressionWrapper(F('quantity') * F('pizza__price'), output_field=MONEY)
+    items = CartItem.objects.select_related('pizza').annotate(subtotal=subtotal).order_by('id')
+    total = Coalesce(
+        Sum(F('items__quantity') * F('items__pizza__price'), output_field=MONEY),
+        Value(Decimal('0')),
+        output_field=MONEY,
+    )
+    return Cart.objects.annotate(total=total).prefetch_related(Prefetch('items', queryset=items))
+
+
+class UnknownPizza(Exception):
+    def __init__(self, pizza_ids):
+        super().__init__(pizza_ids)
+        self.pizza_ids = pizza_ids
+
+
+def add_items(user_id, quantities):
+    """
+    Add ``{pizza_id: quantity}`` to the user's cart in a fixed number of queries.
+    Pizzas that don't exist or aren't available raise ``UnknownPizza``.
+
+    Missing lines are inserted with quantity 0 (conflicts on the unique
+    ``(cart, pizza)`` constraint are ignored), then every line is incremented
+    by a single ``UPDATE ... SET quantity = quantity + CASE ...``. Concurrent
+    adds therefore never lose an increment.
+    """
+    pizza_ids = set(quantities)
+    with transaction.atomic():
+        found = set(Pizza.objects.filter(id__in=pizza_ids, is_available=True).values_list('id', flat=True))
+        if found != pizza_ids:
+            raise UnknownPizza(sorted(pizza_ids - found))
+        cart, _ = Cart.objects.get_or_create(user_id=user_id)
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, pizza_id=pizza_id, quantity=0) for pizza_id in pizza_ids],
+            ignore_conflicts=True,
+        )
+        increment = Case(
+            *[When(pizza_id=pizza_id, then=Value(qty)) for pizza_id, qty in quantities.items()],
+            default=Value(0),
+        )
+        CartItem.objects.filter(cart=cart, pizza_id__in=pizza_ids).update(
+            quantity=F('quantity') + increment
+        )
+    return cart
 
 #VIEW
 
@@ -21,48 +94,57 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Cart, CartItem, Pizza
-from .serializers import CartSerializer
+
+from .throttling import CartThrottle
 
 class CartView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CartThrottle]
+    query_budget = 8
 
     def get_cart(self, user):
-        cart, created = Cart.objects.get_or_create(user=user)
+        cart, created = Cart.objects.get_or_create(user_id=user.id)
         return cart
 
     def get(self, request):
-        cart = self.get_cart(request.user)
+        cart = cart_with_totals().filter(user_id=request.user.id).first()
+        if cart is None:
+            self.get_cart(request.user)
+            cart = cart_with_totals().get(user_id=request.user.id)
         serializer = CartSerializer(cart)
         return Response(serializer.data)
 
     def post(self, request):
-        pizza_id = request.data.get('pizza_id')
-        quantity = request.data.get('quantity', 1)
-
-        if not pizza_id:
+        if not request.data.get('pizza_id'):
             return Response({'error': 'pizza_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
+        serializer = CartAddSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         try:
-            pizza = Pizza.objects.get(id=pizza_id)
-        except Pizza.DoesNotExist:
+            add_items(request.user.id, {serializer.validated_data['pizza_id']: serializer.validated_data['quantity']})
+        except UnknownPizza:
             return Response({'error': 'Pizza not found'}, status=status.HTTP_404_NOT_FOUND)
-
-        cart = self.get_cart(request.user)
-        item, created = CartItem.objects.get_or_create(cart=cart, pizza=pizza)
-        item.quantity += int(quantity)
-        item.save()
         return Response({'message': 'Pizza added to cart'}, status=status.HTTP_200_OK)
 
     def delete(self, request):
-        cart = self.get_cart(request.user)
-        cart.items.all().delete()
+        CartItem.objects.filter(cart__user_id=request.user.id).delete()
         return Response({'message': 'Cart cleared'}, status=status.HTTP_200_OK)
 
-#URLS
 
-from .views import CartView
+class CartBulkAddView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CartThrottle]
+    query_budget = 8
 
-urlpatterns += [
-    path('cart/', CartView.as_view(), name='cart'),
-]
+    def post(self, request):
+        serializer = CartBulkAddSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantities = {}
+        for item in serializer.validated_data['items']:
+            quantities[item['pizza_id']] = quantities.get(item['pizza_id'], 0) + item['quantity']
+        try:
+            add_items(request.user.id, quantities)
+        except UnknownPizza as exc:
+            return Response({'error': 'Pizza not found', 'pizza_ids': exc.pizza_ids},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({'message': 'Pizzas added to cart'}, status=status.HTTP_200_OK)
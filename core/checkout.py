@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .models import Cart, CartItem, Order, OrderItem
+from .serializers import OrderSerializer
+
+class CheckoutSerializer(serializers.Serializer):
+    payment_mode = serializers.ChoiceField(choices=Order.PAYMENT_CHOICES)
+
+#SERVICE
+
+class EmptyCart(Exception):
+    pass
+
+
+class UnavailablePizza(Exception):
+    def __init__(self, pizza_ids):
+        super().__init__(pizza_ids)
+        self.pizza_ids = pizza_ids
+
+
+def checkout(user_id, payment_mode, idempotency_key=None):
+    """
+    Turn the user's cart into an Order and return ``(order, created)``.
+
+    The cart row is locked first so concurrent checkouts for the same user
+    serialize; a retry carrying an Idempotency-Key already used by this user
+    returns the original order instead of creating another. Everything else is
+    a fixed number of statements: one read of the lines (the total and the
+    item prices both come from it, so they always agree), one insert for the
+    order, one bulk insert for its items and one delete for the cart lines.
+    Pizzas taken off the menu since they were added raise ``UnavailablePizza``.
+    """
+    try:
+        with transaction.atomic():
+            cart = Cart.objects.select_for_update().filter(user_id=user_id).first()
+            if idempotency_key:
+                existing = Order.objects.filter(user_id=user_id, idempotency_key=idempotency_key).first()
+                if existing is not None:
+                    return existing, False
+            if cart is None:
+                raise EmptyCart()
+
+            lines = CartItem.objects.filter(cart=cart)
+            rows = list(lines.values_list('pizza_id', 'quantity', 'pizza__price', 'pizza__is_available'))
+            if not rows:
+                raise EmptyCart()
+            unavailable = sorted(pizza_id for pizza_id, _, _, available in rows if not available)
+            if unavailable:
+                raise UnavailablePizza(unavailable)
+
+            order = Order.objects.create(
+                user_id=user_id,
+                total_price=sum((quantity * price for _, quantity, price, _ in rows), Decimal('0')),
+                payment_mode=payment_mode,
+                idempotency_key=idempotency_key,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, pizza_id=pizza_id, quantity=quantity, price=price)
+                for pizza_id, quantity, price, _ in rows
+            ])
+            lines.delete()
+            return order, True
+    except IntegrityError:
+        # Lost a race with a concurrent retry using the same key.
+        if not idempotency_key:
+            raise
+        return Order.objects.get(user_id=user_id, idempotency_key=idempotency_key), False
+
+#VIEW
+
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .throttling import CheckoutThrottle
+
+class CheckoutView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CheckoutThrottle]
+    query_budget = 12
+
+    def post(self, request):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = request.headers.get('Idempotency-Key')
+        if key and len(key) > 64:
+            return Response({'error': 'Idempotency-Key is too long'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order, created = checkout(request.user.id, serializer.validated_data['payment_mode'], key)
+        except EmptyCart:
+            return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        except UnavailablePizza as exc:
+            return Response({'error': 'Pizza not available', 'pizza_ids': exc.pizza_ids},
+                            status=status.HTTP_409_CONFLICT)
+
+        order = Order.objects.prefetch_related('items').get(pk=order.pk)
+        response = Response(OrderSerializer(order).data,
+                            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        if not created:
+            response['Idempotent-Replayed'] = 'true'
+        return response
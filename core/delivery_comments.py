@@ -0,0 +1,98 @@
+from django.conf import settings
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import DeliveryComment, Order
+
+class DeliveryCommentItemSerializer(serializers.Serializer):
+    client_id = serializers.CharField(max_length=64)
+    # Bounded to the 64-bit primary key range so an oversized id is rejected
+    # with the item instead of overflowing in the ownership query.
+    order_id = serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1)
+    comment = serializers.CharField()
+
+class DeliveryCommentBatchSerializer(serializers.Serializer):
+    # Items are checked one by one in the view, so a malformed comment is
+    # reported on its own instead of failing the whole flush.
+    comments = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_comments(self, value):
+        limit = getattr(settings, 'DELIVERY_COMMENT_BATCH_MAX', 100)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'At most {limit} comments per request.')
+        return value
+
+#SERVICE
+
+from django.db import transaction
+
+
+def ingest(partner_id, items):
+    """
+    Store a partner's queued comments and return one result per item, in
+    order: ``created``, ``duplicate`` (its ``client_id`` was already stored
+    for this partner, earlier or in the same batch) or ``rejected`` with
+    ``errors`` on ``order_id`` (the order isn't assigned to the partner).
+
+    Four statements however many items: one read of which orders belong to
+    the partner, one read of which client ids are already stored, one
+    ``bulk_create(ignore_conflicts=True)`` and one read back of what was
+    stored. The unique constraint on (partner, client_id) keeps a flush
+    retried concurrently from storing a comment twice; the read back reports
+    a comment the other flush stored first as ``duplicate``, not ``created``.
+    """
+    order_ids = {item['order_id'] for item in items}
+    client_ids = {item['client_id'] for item in items}
+    with transaction.atomic():
+        owned = set(Order.objects.filter(pk__in=order_ids, delivery_partner_id=partner_id).values_list('id', flat=True))
+        seen = set(DeliveryComment.objects.filter(partner_id=partner_id, client_id__in=client_ids)
+                   .values_list('client_id', flat=True))
+        results, rows = [], {}
+        for item in items:
+            if item['client_id'] in seen:
+                results.append({'client_id': item['client_id'], 'status': 'duplicate'})
+            elif item['order_id'] not in owned:
+                results.append({'client_id': item['client_id'], 'status': 'rejected',
+                                'errors': {'order_id': ['Order not found.']}})
+            else:
+                seen.add(item['client_id'])
+                rows[item['client_id']] = DeliveryComment(order_id=item['order_id'], partner_id=partner_id,
+                                                          comment=item['comment'], client_id=item['client_id'])
+                results.append({'client_id': item['client_id'], 'status': 'created'})
+        if rows:
+            DeliveryComment.objects.bulk_create(rows.values(), ignore_conflicts=True)
+            # Rows skipped on conflict were stored by a concurrent flush; its
+            # timestamp (set per row by auto_now_add) tells them apart.
+            stored = DeliveryComment.objects.filter(partner_id=partner_id, client_id__in=list(rows))
+            lost = {client_id for client_id, timestamp in stored.values_list('client_id', 'timestamp')
+                    if timestamp != rows[client_id].timestamp}
+            for result in results:
+                if result['client_id'] in lost and result['status'] == 'created':
+                    result['status'] = 'duplicate'
+    return results
+
+#VIEW
+
+class DeliveryCommentBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 7
+
+    def post(self, request):
+        if request.user.role != 'delivery_partner':
+            return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = DeliveryCommentBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results, valid = [], []
+        for raw in serializer.validated_data['comments']:
+            item = DeliveryCommentItemSerializer(data=raw)
+            if item.is_valid():
+                valid.append(item.validated_data)
+                results.append(None)
+            else:
+                results.append({'client_id': raw.get('client_id'), 'status': 'rejected', 'errors': item.errors})
+        stored = iter(ingest(request.user.id, valid) if valid else [])
+        results = [result or next(stored) for result in results]
+        return Response({'results': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,283 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Subscriber queues are bounded; a slow client only ever misses intermediate
+# statuses, never the latest one.
+QUEUE_SIZE = 16
+# Seconds between Redis reconnection attempts, doubling up to the maximum.
+RECONNECT_DELAY = 0.5
+RECONNECT_DELAY_MAX = 30
+
+logger = logging.getLogger('core.events')
+
+
+def _offer(queue, message):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+class Subscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fans messages out to asyncio subscribers in this process. ``publish`` is
+    safe to call from sync code on any thread; idle subscribers are just a
+    queue on the event loop.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    async def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(_offer, subscription.queue, message)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis so every worker process sees every event. Each
+    process holds one pattern subscription and fans out to its local queues.
+    If the connection drops, the listener reconnects with backoff; events
+    published in the meantime are missed. Needs the ``redis`` package.
+    """
+    prefix = 'order-events:'
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis
+
+        self.url = url or settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self._listeners = {}
+
+    async def subscribe(self, channel):
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        # A listener that died on something other than a connection error
+        # is started again by the next subscriber.
+        if listener is None or listener.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        return await super().subscribe(channel)
+
+    async def _listen(self):
+        import redis.asyncio
+
+        delay = RECONNECT_DELAY
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(self.prefix + '*')
+                    delay = RECONNECT_DELAY
+                    async for item in pubsub.listen():
+                        if item['type'] == 'pmessage':
+                            channel = item['channel'].decode()[len(self.prefix):]
+                            self.deliver(channel, json.loads(item['data']))
+            except (redis.RedisError, OSError) as e:
+                logger.warning('Order event listener lost Redis (%s); retrying in %ss', e, delay)
+            finally:
+                await client.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'ORDER_EVENTS_BACKEND', 'core.events.InProcessBroker'))()
+    return _broker
+
+
+def order_channel(order_id):
+    return f'order:{order_id}'
+
+
+def partner_channel(partner_id):
+    return f'partner:{partner_id}'
+
+
+def publish_order_status(order_id, status, partner_id=None, version=None):
+    """
+    Announce an order's new status to its own stream and its partner's.
+    ``version`` is the ``Order.version`` the change produced; order streams
+    use it to skip what their opening snapshot already showed.
+    """
+    message = {'order_id': order_id, 'status': status, 'delivery_partner': partner_id, 'version': version}
+    broker = get_broker()
+    broker.publish(order_channel(order_id), message)
+    if partner_id is not None:
+        broker.publish(partner_channel(partner_id), message)
+
+#VIEW
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import HttpResponseForbidden, HttpResponseNotFound, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import StatelessRoleAuthentication
+from .models import Order
+
+
+def _authenticate(request):
+    """Token from the Authorization header, or ?token= for browser EventSource."""
+    auth = StatelessRoleAuthentication()
+    auth.db_lookup = False
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else request.GET.get('token', '').encode()
+    if not raw:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _authorize_order(request, order_id):
+    # Runs on a pooled thread and gives its DB connection back before the
+    # stream starts, so an idle subscriber holds neither.
+    try:
+        user = _authenticate(request)
+        if user is None:
+            return None, None
+        order = Order.objects.filter(pk=order_id).values('user_id', 'delivery_partner_id').first()
+        if order is None:
+            return user, None
+        allowed = (user.role == 'admin' or order['user_id'] == user.id
+                   or order['delivery_partner_id'] == user.id)
+        return user, allowed
+    finally:
+        connections.close_all()
+
+
+def _order_snapshot(order_id):
+    try:
+        order = Order.objects.filter(pk=order_id).values('status', 'delivery_partner_id', 'version').first()
+        if order is None:
+            return None
+        return {'order_id': order_id, 'status': order['status'],
+                'delivery_partner': order['delivery_partner_id'], 'version': order['version']}
+    finally:
+        connections.close_all()
+
+
+def _is_final(message):
+    return not Order.TRANSITIONS.get(message['status'])
+
+
+def _authenticate_and_release(request):
+    try:
+        return _authenticate(request)
+    finally:
+        connections.close_all()
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def _stream(channel, snapshot=None):
+    # Subscribing inside the generator ties the subscription's lifetime to
+    # the response: it is dropped when the client goes away.
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    subscription = await get_broker().subscribe(channel)
+    try:
+        seen = None
+        if snapshot is not None:
+            # Read only once subscribed, so a change landing in between is
+            # queued rather than lost; queued messages the snapshot already
+            # reflects are skipped by version. Order streams end once the
+            # order can't change any more.
+            first = await sync_to_async(snapshot, thread_sensitive=False)()
+            if first is None:
+                return
+            yield _sse('status', first)
+            if _is_final(first):
+                return
+            seen = first['version']
+        while True:
+            try:
+                message = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if seen is not None and message.get('version') is not None and message['version'] <= seen:
+                continue
+            yield _sse('status', message)
+            if snapshot is not None and _is_final(message):
+                return
+    finally:
+        subscription.close()
+
+
+def _event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def order_events(request, order_id):
+    """``GET /api/orders/<id>/events/``: Server-Sent Events for one order's status."""
+    user, allowed = await sync_to_async(_authorize_order, thread_sensitive=False)(request, order_id)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if not allowed:
+        return HttpResponseNotFound()
+    return _event_stream_response(_stream(order_channel(order_id), lambda: _order_snapshot(order_id)))
+
+
+async def partner_events(request):
+    """``GET /api/partner/events/``: status changes for every order assigned to the caller."""
+    user = await sync_to_async(_authenticate_and_release, thread_sensitive=False)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if user.role != 'delivery_partner':
+        return HttpResponseForbidden()
+    return _event_stream_response(_stream(partner_channel(user.id)))
@@ -0,0 +1,179 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Order, OrderItem
+
+CHUNK_SIZE = 2000
+
+ORDER_FIELDS = (
+    'id', 'user_id', 'delivery_partner_id', 'status', 'total_price', 'payment_mode',
+    'payment_status', 'created_at',
+)
+ITEM_FIELDS = ('order_id', 'pizza_id', 'pizza__name', 'quantity', 'price')
+
+CSV_HEADER = (
+    'order_id', 'created_at', 'user_id', 'delivery_partner_id', 'status', 'payment_mode',
+    'payment_status', 'total_price', 'pizza_id', 'pizza', 'quantity', 'price',
+)
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    since = serializers.DateField(required=False, help_text='First day included (UTC date).')
+    until = serializers.DateField(required=False, help_text='Last day included (UTC date).')
+    status = serializers.MultipleChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if attrs.get('since') and attrs.get('until') and attrs['since'] > attrs['until']:
+            raise serializers.ValidationError('since must not be after until')
+        return attrs
+
+#SERVICE
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(orders, since=None, until=None, status=None):
+    # Bounds are turned into a half-open created_at range rather than
+    # created_at__date, which would wrap the column and skip its index.
+    if since:
+        orders = orders.filter(created_at__gte=_start_of(since))
+    if until:
+        orders = orders.filter(created_at__lt=_start_of(until + timedelta(days=1)))
+    if status:
+        orders = orders.filter(status__in=sorted(status))
+    return orders
+
+
+def iter_orders(since=None, until=None, status=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield ``(order, items)`` in order id order: the order as a dict, its items
+    as ``ITEM_FIELDS`` tuples.
+
+    Two cursors are read side by side with ``iterator(chunk_size)``: orders by
+    id, and their items by order id. They are merged like a sort-merge join,
+    so at most one chunk of each is held in memory whatever the export size.
+    Both stop at the highest matching order id read up front, so an order
+    committed while the export runs is left out rather than listed without
+    its items. Three queries for the whole export.
+    """
+    orders = filter_orders(Order.objects.all(), since, until, status)
+    last_id = orders.aggregate(last=Max('id'))['last']
+    if last_id is None:
+        return
+    orders = orders.filter(id__lte=last_id)
+    items = OrderItem.objects.filter(order__in=orders.values('id')).order_by('order_id', 'id')
+    orders = orders.order_by('id').values(*ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    items = items.values_list(*ITEM_FIELDS).iterator(chunk_size=chunk_size)
+
+    pending = next(items, None)
+    for order in orders:
+        lines = []
+        while pending is not None and pending[0] <= order['id']:
+            if pending[0] == order['id']:
+                lines.append(pending)
+            pending = next(items, None)
+        yield order, lines
+
+
+def _ndjson_record(order, lines):
+    return json.dumps({
+        **order,
+        'total_price': str(order['total_price']),
+        'created_at': order['created_at'].isoformat(),
+        'items': [
+            {'pizza_id': pizza_id, 'pizza': name, 'quantity': quantity, 'price': str(price)}
+            for _, pizza_id, name, quantity, price in lines
+        ],
+    }, separators=(',', ':')) + '\n'
+
+
+class _Line:
+    """File-like target for csv.writer that hands back what was written."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_rows(order, lines):
+    head = (
+        order['id'], order['created_at'].isoformat(), order['user_id'], order['delivery_partner_id'],
+        order['status'], order['payment_mode'], order['payment_status'], order['total_price'],
+    )
+    if not lines:
+        return [head + (None, None, None, None)]
+    return [head + (pizza_id, name, quantity, price) for _, pizza_id, name, quantity, price in lines]
+
+
+def export_orders(fmt='ndjson', since=None, until=None, status=None, chunk_size=CHUNK_SIZE):
+    """
+    Generate the export as text chunks of roughly ``chunk_size`` orders each.
+    NDJSON is one order per line with its items nested; CSV is one row per
+    order item, with order columns repeated (and blank item columns for an
+    order without items).
+    """
+    writer = csv.writer(_Line()) if fmt == 'csv' else None
+    buffer = []
+    if writer:
+        buffer.append(writer.writerow(CSV_HEADER))
+    for count, (order, lines) in enumerate(iter_orders(since, until, status, chunk_size), 1):
+        if writer:
+            buffer.extend(writer.writerow(row) for row in _csv_rows(order, lines))
+        else:
+            buffer.append(_ndjson_record(order, lines))
+        if count % chunk_size == 0:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+#VIEW
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.views import APIView
+
+from .fast_json import FastJSONRenderer
+from .permissions import IsAdminUser
+
+
+class NDJSONRenderer(BaseRenderer):
+    # The export view streams its own body; renderers are only here so that
+    # ?format= and Accept take part in content negotiation.
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class OrderExportView(APIView):
+    permission_classes = [IsAdminUser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        filters = ExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        fmt = request.accepted_renderer.format
+        response = StreamingHttpResponse(
+            export_orders(fmt, **filters.validated_data),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+        )
+        stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+        response['Content-Disposition'] = f'attachment; filename="orders-{stamp}.{fmt}"'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors (400/401/403, unknown ?format=) are ordinary JSON bodies.
+        if not isinstance(response, StreamingHttpResponse):
+            request.accepted_renderer, request.accepted_media_type = FastJSONRenderer(), 'application/json'
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,64 @@
+"""
+JSON renderer and parser for DRF backed by orjson, registered in
+``REST_FRAMEWORK`` in place of the stdlib ones. Without orjson installed they
+behave exactly like DRF's ``JSONRenderer`` / ``JSONParser``.
+
+Output is byte-for-byte what ``JSONRenderer`` produces: compact separators,
+UTF-8, U+2028/U+2029 escaped, and datetimes, dates, times and Decimals in
+DRF's own formats (orjson hands them to DRF's encoder). UUIDs are native.
+The only spelling difference is floats below 1e-4 or from 1e16 up (orjson
+writes ``0.00001`` and ``1e16``, stdlib ``1e-05`` and ``1e+16``); none of the
+API's floats are in that range. Anything orjson refuses (integers wider than
+64 bits, non-string keys, indented output for the browsable API) falls back to
+the stdlib path.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+_LINE_SEPARATORS = (b'\xe2\x80\xa8', b'\xe2\x80\xa9')
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if _LINE_SEPARATORS[0] in ret or _LINE_SEPARATORS[1] in ret:
+            ret = ret.replace(_LINE_SEPARATORS[0], b'\\u2028').replace(_LINE_SEPARATORS[1], b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        raw = stream.read()
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return orjson.loads(raw if encoding.lower().replace('-', '') == 'utf8' else raw.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            pass
+        # Let the stdlib parser have the last word: it accepts a few inputs
+        # orjson rejects (lone surrogate escapes, NaN when STRICT_JSON is off)
+        # and words its ParseError messages the way clients already see them.
+        return super().parse(io.BytesIO(raw), media_type, parser_context)
@@ -0,0 +1,241 @@
+"""
+Read-only list serialization straight from ``values_list()`` rows.
+
+``FlatSerializer`` takes an existing ``ModelSerializer`` class and compiles
+its field set once: which column each field reads and how the value is
+converted. Lists are then built from named row tuples, with no model
+instances and no per-row trip through DRF's field machinery, and come out
+key for key and byte for byte like the original serializer's ``.data``.
+
+Supported fields:
+- model columns, with converters chosen up front;
+- ``PrimaryKeyRelatedField`` on a forward FK (reads ``<fk>_id``);
+- ``SerializerMethodField``: the method gets the named row tuple, not a
+  model instance. Its attributes are every concrete column of the model
+  (``<fk>_id`` for foreign keys), so a method may only read those; one that
+  follows a relation or calls a model property or method fails on the first
+  row with ``ImproperlyConfigured``, which cannot be caught when the plan is
+  compiled;
+- a nested ``many=True`` model serializer over a reverse FK, fetched with
+  one extra ``values_list()`` query per page, the way ``prefetch_related``
+  would.
+
+Any other field raises ``ImproperlyConfigured`` when the plan is compiled.
+Views opt in with ``FlatListMixin``.
+"""
+import decimal
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .middleware import serializer_timer
+
+# DRF fields whose to_representation returns a database value of the right
+# type unchanged.
+_IDENTITY = {
+    serializers.CharField.to_representation,
+    serializers.ChoiceField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.BooleanField.to_representation,
+    serializers.ReadOnlyField.to_representation,
+}
+
+_COLUMN, _METHOD, _NESTED = range(3)
+
+_plans = {}
+
+
+def _decimal(field):
+    to_representation = field.to_representation
+    if (field.decimal_places is None or field.localize or field.normalize_output
+            or not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+        return lambda: to_representation
+    # DecimalField.quantize, with the exponent and context built once.
+    exponent = Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if type(value) is not Decimal:
+            return to_representation(value)
+        return f'{value.quantize(exponent, rounding=field.rounding, context=context):f}'
+    return lambda: convert
+
+
+def _datetime(field):
+    to_representation = field.to_representation
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601 or hasattr(field, 'timezone'):
+        return lambda: to_representation
+
+    def make():
+        # DateTimeField.to_representation for aware values, with the current
+        # timezone looked up once per list instead of once per value.
+        tz = field.default_timezone()
+        if tz is None:
+            return to_representation
+
+        def convert(value):
+            if type(value) is not datetime or value.tzinfo is None:
+                return to_representation(value)
+            text = value.astimezone(tz).isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return convert
+    return make
+
+
+def _converter(field):
+    """
+    A factory, called once per ``serialize``, for the function that turns a
+    column value into the field's representation; None when the value
+    passes through unchanged.
+    """
+    if type(field).to_representation in _IDENTITY:
+        return None
+    if isinstance(field, serializers.BigIntegerField) and not getattr(
+            field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING):
+        return None
+    if type(field) is serializers.DecimalField:
+        return _decimal(field)
+    if type(field) is serializers.DateTimeField:
+        return _datetime(field)
+    to_representation = field.to_representation
+    return lambda: to_representation
+
+
+class FlatSerializer:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.plan = []
+        self.columns = []
+        self.nested = {}
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            self.plan.append(self._compile(name, field))
+        if any(kind == _METHOD for _, kind, _ in self.plan):
+            self._add_column(*[f.attname for f in self.model._meta.concrete_fields])
+        self._add_column(self.model._meta.pk.attname)
+        # Column positions are only known once every field has been compiled.
+        self.plan = [
+            (name, kind, (self.columns.index(arg[0]), arg[1]) if kind == _COLUMN else arg)
+            for name, kind, arg in self.plan
+        ]
+        self.pk_index = self.columns.index(self.model._meta.pk.attname)
+
+    @classmethod
+    def for_serializer(cls, serializer_class):
+        plan = _plans.get(serializer_class)
+        if plan is None:
+            plan = _plans[serializer_class] = cls(serializer_class)
+        return plan
+
+    def _add_column(self, *columns):
+        for column in columns:
+            if column not in self.columns:
+                self.columns.append(column)
+
+    def _unsupported(self, name, field):
+        return ImproperlyConfigured(
+            f'{self.serializer_class.__name__}.{name}: {type(field).__name__} '
+            f'(source {field.source!r}) is not supported by FlatSerializer'
+        )
+
+    def _compile(self, name, field):
+        if isinstance(field, serializers.SerializerMethodField):
+            return name, _METHOD, field.method_name
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise self._unsupported(name, field)
+        if isinstance(field, serializers.ListSerializer):
+            if not (model_field.one_to_many and isinstance(field.child, serializers.ModelSerializer)):
+                raise self._unsupported(name, field)
+            self.nested[name] = (FlatSerializer.for_serializer(type(field.child)), model_field.field.attname)
+            return name, _NESTED, None
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if not model_field.many_to_one or field.pk_field is not None:
+                raise self._unsupported(name, field)
+            self._add_column(model_field.attname)
+            return name, _COLUMN, (model_field.attname, None)
+        if model_field.is_relation or isinstance(field, serializers.Serializer):
+            raise self._unsupported(name, field)
+        self._add_column(model_field.attname)
+        return name, _COLUMN, (model_field.attname, _converter(field))
+
+    def rows(self, queryset, *extra):
+        """``queryset`` as named row tuples carrying every column the plan reads (plus ``extra``)."""
+        columns = self.columns + [c for c in extra if c not in self.columns]
+        return queryset.prefetch_related(None).values_list(*columns, named=True)
+
+    def serialize(self, rows, context=None):
+        rows = list(rows)
+        with serializer_timer():
+            return self._serialize(rows, context)
+
+    def _serialize(self, rows, context):
+        serializer = self.serializer_class(context=context or {})
+        methods = {name: getattr(serializer, arg) for name, kind, arg in self.plan if kind == _METHOD}
+        converters = {name: arg[1]() for name, kind, arg in self.plan if kind == _COLUMN and arg[1]}
+        children = {
+            name: flat.children_of([row[self.pk_index] for row in rows], fk, context)
+            for name, (flat, fk) in self.nested.items()
+        }
+        data = []
+        for row in rows:
+            item = {}
+            for name, kind, arg in self.plan:
+                if kind == _COLUMN:
+                    value = row[arg[0]]
+                    item[name] = value if arg[1] is None or value is None else converters[name](value)
+                elif kind == _METHOD:
+                    try:
+                        item[name] = methods[name](row)
+                    except AttributeError as e:
+                        raise ImproperlyConfigured(
+                            f'{self.serializer_class.__name__}.{arg} needs a model instance ({e}); '
+                            f'FlatSerializer passes it a values_list() row'
+                        ) from e
+                else:
+                    item[name] = children[name].get(row[self.pk_index], [])
+            data.append(item)
+        return data
+
+    def children_of(self, parent_ids, fk, context=None):
+        """Serialized rows grouped by ``fk`` for the given parents, in primary key order."""
+        if not parent_ids:
+            return {}
+        rows = self.rows(self.model._default_manager.filter(**{f'{fk}__in': parent_ids}), fk)
+        rows = list(rows.order_by(self.model._meta.pk.attname))
+        grouped = defaultdict(list)
+        for row, item in zip(rows, self.serialize(rows, context)):
+            grouped[getattr(row, fk)].append(item)
+        return grouped
+
+
+class FlatListMixin:
+    """
+    Serve ``list`` from ``values_list()`` rows through a ``FlatSerializer`` of
+    the view's serializer class. Filtering, pagination (keyset cursors read
+    their position from the row) and the response shape stay the same.
+
+    The serializer's ``get_<field>`` methods then receive row tuples with the
+    model's columns only, never instances; keep them to plain column reads.
+    """
+
+    def list(self, request, *args, **kwargs):
+        flat = FlatSerializer.for_serializer(self.get_serializer_class())
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        rows = flat.rows(self.filter_queryset(self.get_queryset()), *[o.lstrip('-') for o in ordering])
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(flat.serialize(rows, self.get_serializer_context()))
+        return self.get_paginated_response(flat.serialize(page, self.get_serializer_context()))
@@ -0,0 +1,367 @@
+"""
+Asyncio load generator replaying the customer / delivery partner / admin
+flows from the Postman guide against a running server.
+
+Standard library only, so it can be pointed at any deployment (runserver,
+gunicorn, uvicorn) from any machine: ``python -m core.loadtest --help`` or
+``python manage.py loadtest``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection; each virtual user owns one."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Accept: application/json',
+            f'Content-Length: {len(payload)}',
+        ]
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines.extend(f'{k}: {v}' for k, v in (headers or {}).items())
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+        for attempt in range(2):
+            if self.writer is None:
+                await self._connect()
+            try:
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Server closed an idle keep-alive connection; retry once fresh.
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        elif status in (204, 304):
+            body = b''
+        else:
+            body = await self.reader.read()
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, body
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def add(self, name, seconds, status):
+        self.latencies[name].append(seconds)
+        self.statuses[name][status] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(name, []))
+            entry = {
+                'requests': len(samples),
+                'errors': self.errors.get(name, 0),
+                'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                'statuses': {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+            if samples:
+                entry.update({
+                    'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+                    'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+                    'p95_ms': round(_percentile(samples, 95) * 1000, 3),
+                    'p99_ms': round(_percentile(samples, 99) * 1000, 3),
+                })
+            endpoints[name] = entry
+        return endpoints
+
+
+def _percentile(ordered, pct):
+    # Nearest rank: the smallest sample with at least pct% of samples at or below it.
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[index]
+
+
+class VirtualUser:
+    def __init__(self, run, conn, role):
+        self.run = run
+        self.conn = conn
+        self.role = role
+        self.token = None
+
+    async def call(self, name, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        started = time.perf_counter()
+        try:
+            status, _, raw = await self.conn.request(method, self.run.prefix + path, body, headers)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            self.run.recorder.errors[name] += 1
+            return None, None
+        self.run.recorder.add(name, time.perf_counter() - started, status)
+        if status >= 500:
+            self.run.recorder.errors[name] += 1
+        try:
+            return status, json.loads(raw) if raw else None
+        except ValueError:
+            return status, None
+
+    async def signup(self):
+        if self.role == 'admin':
+            # Admin accounts can't come from public registration; the run is
+            # given one that already exists (manage.py loadtest creates it).
+            username, password = self.run.admin_credentials
+        else:
+            username = f'lt-{self.role}-{uuid.uuid4().hex[:12]}'
+            password = 'Lt-' + uuid.uuid4().hex
+            await self.call('POST /register/', 'POST', '/register/', {
+                'username': username, 'email': f'{username}@example.com',
+                'password': password, 'role': self.role,
+            })
+        status, data = await self.call('POST /login/', 'POST', '/login/',
+                                       {'username': username, 'password': password})
+        if status == 200:
+            self.token = data['access']
+        return status == 200
+
+    async def customer_flow(self):
+        if not self.token and not await self.signup():
+            return
+        status, data = await self.call('GET /pizzas/', 'GET', '/pizzas/')
+        pizzas = _results(data) if status == 200 else []
+        if not pizzas:
+            return
+        for pizza in random.sample(pizzas, min(len(pizzas), random.randint(1, 3))):
+            await self.call('POST /cart/', 'POST', '/cart/',
+                            {'pizza_id': pizza['id'], 'quantity': random.randint(1, 3)})
+        await self.call('GET /cart/', 'GET', '/cart/')
+        status, order = await self.call('POST /checkout/', 'POST', '/checkout/',
+                                        {'payment_mode': random.choice(['cod', 'online'])},
+                                        {'Idempotency-Key': uuid.uuid4().hex})
+        if status in (200, 201) and order:
+            self.run.new_orders.append(order['id'])
+        await self.call('GET /orders/', 'GET', '/orders/')
+
+    async def admin_flow(self):
+        if not self.token and not await self.signup():
+            return
+        await self.call('GET /pizzas/', 'GET', '/pizzas/')
+        if random.random() < 0.1:
+            await self.call('POST /pizzas/', 'POST', '/pizzas/', {
+                'name': f'Load test special {uuid.uuid4().hex[:6]}', 'description': 'Seasonal',
+                'price': f'{random.uniform(6, 16):.2f}', 'type': random.choice(['veg', 'non-veg']),
+            })
+        # Kitchen: move freshly placed orders into preparing for the dispatcher.
+        if self.run.new_orders:
+            order_id = self.run.new_orders.pop()
+            status, _ = await self.call('PATCH /orders/<id>/update-status/', 'PATCH',
+                                        f'/orders/{order_id}/update-status/', {'status': 'preparing'})
+            if status == 200:
+                self.run.preparing.append(order_id)
+
+    async def partner_flow(self):
+        if not self.token and not await self.signup():
+            return
+        # Orders only succeed once the dispatcher has assigned them to this
+        # partner; 404s for other partners' orders are part of the mix.
+        if self.run.preparing:
+            order_id = self.run.preparing.pop()
+            status, _ = await self.call('PATCH /orders/<id>/update-status/', 'PATCH',
+                                        f'/orders/{order_id}/update-status/', {'status': 'out_for_delivery'})
+            if status == 404:
+                self.run.preparing.insert(0, order_id)
+        else:
+            await self.call('GET /pizzas/', 'GET', '/pizzas/')
+
+
+def _results(data):
+    if isinstance(data, dict):
+        return data.get('results', [])
+    return data or []
+
+
+class LoadRun:
+    def __init__(self, base_url, concurrency, duration, mix, think_time=0.0, admin_credentials=None):
+        if mix.get('admin') and not admin_credentials:
+            raise ValueError('admin flows need an existing admin account (--admin-username/--admin-password)')
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.concurrency = concurrency
+        self.duration = duration
+        self.mix = mix
+        self.think_time = think_time
+        self.admin_credentials = admin_credentials
+        self.recorder = Recorder()
+        self.new_orders = []
+        self.preparing = []
+
+    async def _worker(self, role, deadline):
+        conn = Connection(self.host, self.port)
+        user = VirtualUser(self, conn, role)
+        flow = {
+            'customer': user.customer_flow,
+            'delivery_partner': user.partner_flow,
+            'admin': user.admin_flow,
+        }[role]
+        try:
+            while time.monotonic() < deadline:
+                await flow()
+                if self.think_time:
+                    await asyncio.sleep(random.expovariate(1 / self.think_time))
+        finally:
+            await conn.close()
+
+    async def _run(self):
+        roles = list(itertools.chain.from_iterable([role] * weight for role, weight in self.mix.items()))
+        deadline = time.monotonic() + self.duration
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._worker(roles[i % len(roles)], deadline) for i in range(self.concurrency)
+        ))
+        return time.perf_counter() - started
+
+    def run(self):
+        elapsed = asyncio.run(self._run())
+        return {
+            'meta': {
+                'base_url': f'http://{self.host}:{self.port}{self.prefix}',
+                'concurrency': self.concurrency,
+                'duration_s': round(elapsed, 3),
+                'mix': self.mix,
+                'commit': _git_commit(),
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'endpoints': self.recorder.report(elapsed),
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(value):
+    """``customer=8,delivery_partner=1,admin=1`` -> ``{'customer': 8, ...}``"""
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        if role.strip() not in ('customer', 'delivery_partner', 'admin'):
+            raise argparse.ArgumentTypeError(f'unknown role {role!r}')
+        mix[role.strip()] = int(weight or 1)
+    return mix
+
+
+def format_report(result, baseline=None):
+    lines = [
+        f"{'endpoint':<36}{'req':>8}{'err':>6}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}",
+    ]
+    for name, e in result['endpoints'].items():
+        line = (f"{name:<36}{e['requests']:>8}{e['errors']:>6}{e['throughput_rps']:>10.1f}"
+                f"{e.get('p50_ms', 0):>9.1f}{e.get('p95_ms', 0):>9.1f}{e.get('p99_ms', 0):>9.1f}")
+        before = (baseline or {}).get('endpoints', {}).get(name)
+        if before and before.get('p95_ms') and e.get('p95_ms'):
+            line += (f"   rps {e['throughput_rps'] / max(before['throughput_rps'], 1e-9):.2f}x"
+                     f"  p95 {e['p95_ms'] / before['p95_ms']:.2f}x")
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument('--url', default='http://127.0.0.1:8000/api', help='API base URL.')
+    parser.add_argument('--concurrency', type=int, default=20, help='Virtual users.')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run.')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('customer=8,delivery_partner=1,admin=1'),
+                        help='Role weights, e.g. customer=8,delivery_partner=1,admin=1.')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Mean pause between flows (s).')
+    parser.add_argument('--admin-username', help='Existing admin account used by the admin flows.')
+    parser.add_argument('--admin-password', help='Password of --admin-username.')
+    parser.add_argument('--label', default='', help='Free-form tag stored with the results, e.g. wsgi or asgi.')
+    parser.add_argument('--output', help='Write JSON results here.')
+    parser.add_argument('--compare', help='Earlier JSON results to print ratios against.')
+
+
+def run_from_options(options, write=print):
+    admin = None
+    if options.get('admin_username'):
+        admin = (options['admin_username'], options['admin_password'] or '')
+    result = LoadRun(options['url'], options['concurrency'], options['duration'],
+                     options['mix'], options['think_time'], admin).run()
+    result['meta']['label'] = options['label']
+    baseline = None
+    if options.get('compare'):
+        with open(options['compare']) as fh:
+            baseline = json.load(fh)
+    write(format_report(result, baseline))
+    if options.get('output'):
+        with open(options['output'], 'w') as fh:
+            json.dump(result, fh, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    try:
+        run_from_options(vars(parser.parse_args()))
+    except ValueError as exc:
+        parser.error(str(exc))
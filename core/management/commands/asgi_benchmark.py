@@ -0,0 +1,142 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadtest
+from core.authentication import RoleTokenObtainPairSerializer
+from core.models import Cart, CartItem, CustomUser, Order, OrderItem, Pizza
+
+USERNAME = 'asgi-benchmark'
+
+
+@contextmanager
+def _serve(argv, port):
+    env = dict(os.environ, THROTTLING='off')
+    process = subprocess.Popen([sys.executable] + argv, cwd=settings.BASE_DIR, env=env)
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            if process.poll() is not None:
+                raise CommandError(f'{argv[1]} exited with {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f'{argv[1]} did not start listening on port {port}')
+                time.sleep(0.2)
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the read endpoints with gunicorn (sync DRF views, WSGI) and then "
+        "uvicorn (the /api/async/ views, ASGI) at the same worker count, and "
+        "compare requests/s and p50/p95/p99 latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes for both servers.')
+        parser.add_argument('--wsgi-threads', type=int, default=1,
+                            help='Threads per gunicorn worker (more than 1 uses the gthread worker).')
+        parser.add_argument('--concurrency', type=int, default=64, help='Connections kept busy.')
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds per server.')
+        parser.add_argument('--orders', type=int, default=25, help='Order history size of the benchmark user.')
+
+    def handle(self, *args, **options):
+        for module in ('gunicorn', 'uvicorn'):
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(f'{module} is not installed (pip install {module}).')
+        token, pizza_id = self.prepare(options['orders'])
+        paths = ['/pizzas/', f'/pizzas/{pizza_id}/', '/cart/', '/orders/']
+        workers = str(options['workers'])
+        deployments = [
+            ('wsgi', '/api', [
+                '-m', 'gunicorn', 'pizza_delivery.wsgi:application', '--workers', workers,
+                '--threads', str(options['wsgi_threads']), '--log-level', 'warning', '--bind',
+            ]),
+            ('asgi', '/api/async', [
+                '-m', 'uvicorn', 'pizza_delivery.asgi:application', '--workers', workers,
+                '--log-level', 'warning', '--no-access-log', '--port',
+            ]),
+        ]
+        self.stdout.write(f"{'server':<8}{'endpoint':<22}{'req':>8}{'err':>6}{'rps':>10}"
+                          f"{'p50':>9}{'p95':>9}{'p99':>9}")
+        for label, prefix, argv in deployments:
+            port = _free_port()
+            argv = argv + ([f'127.0.0.1:{port}'] if label == 'wsgi' else [str(port)])
+            with _serve(argv, port):
+                recorder, elapsed = asyncio.run(
+                    self.drive(port, prefix, paths, token, options['concurrency'], options['duration']))
+            for name, e in recorder.report(elapsed).items():
+                self.stdout.write(f"{label:<8}{name:<22}{e['requests']:>8}{e['errors']:>6}"
+                                  f"{e['throughput_rps']:>10.1f}{e.get('p50_ms', 0):>9.1f}"
+                                  f"{e.get('p95_ms', 0):>9.1f}{e.get('p99_ms', 0):>9.1f}")
+
+    def prepare(self, orders):
+        """A customer with a cart and some order history; returns an access token for them."""
+        pizzas = list(Pizza.objects.filter(is_available=True).order_by('id')[:5])
+        if not pizzas:
+            raise CommandError('No available pizzas; run seed_data first.')
+        user, _ = CustomUser.objects.get_or_create(username=USERNAME, defaults={'role': 'customer'})
+        cart, _ = Cart.objects.get_or_create(user=user)
+        for pizza in pizzas[:3]:
+            CartItem.objects.get_or_create(cart=cart, pizza=pizza, defaults={'quantity': 1})
+        missing = orders - Order.objects.filter(user=user).count()
+        for i in range(max(0, missing)):
+            order = Order.objects.create(user=user, status='delivered', total_price=pizzas[0].price,
+                                         payment_mode='cod')
+            OrderItem.objects.create(order=order, pizza=pizzas[i % len(pizzas)], quantity=1, price=pizzas[0].price)
+        token = RoleTokenObtainPairSerializer.get_token(user).access_token
+        return str(token), pizzas[0].id
+
+    async def drive(self, port, prefix, paths, token, concurrency, duration):
+        recorder = loadtest.Recorder()
+        headers = {'Authorization': f'Bearer {token}'}
+        deadline = time.monotonic() + duration
+
+        async def client(offset):
+            conn = loadtest.Connection('127.0.0.1', port)
+            try:
+                # Warm the connection (and each worker's menu cache) before timing.
+                await conn.request('GET', prefix + paths[0], headers=headers)
+                i = offset
+                while time.monotonic() < deadline:
+                    path = paths[i % len(paths)]
+                    i += 1
+                    started = time.perf_counter()
+                    try:
+                        status, _, _ = await conn.request('GET', prefix + path, headers=headers)
+                    except (OSError, asyncio.IncompleteReadError, ValueError):
+                        recorder.errors[path] += 1
+                        continue
+                    recorder.add(path, time.perf_counter() - started, status)
+                    if status >= 400:
+                        recorder.errors[path] += 1
+            finally:
+                await conn.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+        return recorder, time.perf_counter() - started
@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from core.models import Order
+from core.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily/hourly sales rollups from Order/OrderItem, a few days at "
+        "a time. Each chunk replaces its days, so the command can be re-run or resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='First day, YYYY-MM-DD (default: first order).')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day, YYYY-MM-DD (default: last order).')
+        parser.add_argument('--days-per-chunk', type=int, default=7)
+
+    def handle(self, *args, **options):
+        span = Order.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+        if span['first'] is None:
+            self.stdout.write('No orders to roll up')
+            return
+        day = options['since'] or timezone.localtime(span['first']).date()
+        last = options['until'] or timezone.localtime(span['last']).date()
+        step = timedelta(days=options['days_per_chunk'])
+        rows = 0
+        while day <= last:
+            chunk_end = min(day + step - timedelta(days=1), last)
+            rows += rebuild(day, chunk_end)
+            self.stdout.write(f'{day} .. {chunk_end}: {rows} hourly rows so far')
+            day = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales rollups ({rows} hourly rows)'))
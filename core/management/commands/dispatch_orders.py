@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.dispatch import POLICIES, Dispatcher, get_policy
+
+
+class Command(BaseCommand):
+    help = "Assign 'preparing' orders to idle delivery partners. Safe to run several copies at once."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--policy', choices=sorted(POLICIES), help='Defaults to settings.DISPATCH_POLICY.')
+        parser.add_argument('--capacity', type=int, help='Max active orders per partner.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of draining once.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when idle (--loop).')
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(options['batch_size'], get_policy(options['policy']), options['capacity'])
+        try:
+            while True:
+                assigned = dispatcher.run_once()
+                if assigned:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned {dispatcher.assigned} orders in {dispatcher.batches} batches '
+            f'({dispatcher.throughput:.1f} assignments/s)'
+        ))
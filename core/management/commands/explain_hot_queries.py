@@ -0,0 +1,83 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import CustomUser, DeliveryComment, Order, Pizza, Rating
+from core.seeding import Seeder
+
+INDEXED_MODELS = (Order, Rating, DeliveryComment)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, then print the query plan and timing of "
+        "the hot order/rating/comment queries without and with the access-path indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=200, help='Executions per query when timing.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options)
+            queries = self.hot_queries()
+            with connection.schema_editor() as editor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+            before = self.measure('without indexes', queries, options['repeat'])
+            with connection.schema_editor() as editor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        editor.add_index(model, index)
+            after = self.measure('with indexes', queries, options['repeat'])
+            self.stdout.write('\nSummary (ms per query)')
+            for name in queries:
+                self.stdout.write(f'  {name:<28} {before[name]:8.3f} -> {after[name]:8.3f}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, options):
+        stats = Seeder(seed=options['seed'], users=options['users'], orders=options['orders']).run()
+        rng = random.Random(options['seed'])
+
+        def pick(values):
+            return rng.choice(list(values[:1000]))
+
+        self.sample = {
+            'user': pick(Order.objects.values_list('user_id', flat=True)),
+            'partner': pick(CustomUser.objects.filter(role='delivery_partner').values_list('pk', flat=True)),
+            'pizza': pick(Pizza.objects.values_list('pk', flat=True)),
+            'order': pick(DeliveryComment.objects.values_list('order_id', flat=True)),
+        }
+        self.stdout.write(f"Seeded {stats['rows']:,} rows in {stats['seconds']:.1f}s")
+
+    def hot_queries(self):
+        sample = self.sample
+        return {
+            'orders for user': Order.objects.filter(user_id=sample['user']).order_by('-created_at')[:20],
+            'partner active orders': Order.objects.filter(
+                delivery_partner_id=sample['partner'], status__in=Order.ACTIVE_STATUSES),
+            'ratings for pizza': Rating.objects.filter(pizza_id=sample['pizza']).order_by('-created_at')[:20],
+            'comments for order': DeliveryComment.objects.filter(order_id=sample['order']).order_by('timestamp'),
+            'active orders queue': Order.objects.filter(status='preparing').order_by('created_at')[:50],
+        }
+
+    def measure(self, label, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label}'))
+        timings = {}
+        for name, queryset in queries.items():
+            self.stdout.write(f'-- {name}')
+            self.stdout.write(queryset.explain())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            timings[name] = (time.perf_counter() - started) * 1000 / repeat
+        return timings
@@ -0,0 +1,34 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import CHUNK_SIZE, export_orders
+from core.models import Order
+
+
+class Command(BaseCommand):
+    help = "Stream orders with their items as NDJSON or CSV, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--since', type=date.fromisoformat, help='First day included, YYYY-MM-DD.')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day included, YYYY-MM-DD.')
+        parser.add_argument('--status', action='append', choices=dict(Order.STATUS_CHOICES),
+                            help='Repeat to include several statuses.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--output', help='File to write; defaults to stdout.')
+
+    def handle(self, *args, **options):
+        if options['since'] and options['until'] and options['since'] > options['until']:
+            raise CommandError('--since must not be after --until')
+        chunks = export_orders(
+            options['format'], options['since'], options['until'], options['status'], options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in chunks:
+                out.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,61 @@
+import io
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import fast_json
+from core.fast_json import FastJSONParser, FastJSONRenderer
+from core.models import Order, Pizza
+from core.serializers import OrderSerializer, PizzaSerializer
+
+
+def _page(results):
+    return {'next': 'http://localhost:8000/api/pizzas/?cursor=cD0yMA%3D%3D', 'previous': None, 'results': results}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time DRF's JSONRenderer/JSONParser against core.fast_json on menu and "
+        "order-history pages built from the database, and check the bytes match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Rows per rendered page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the best one is reported.')
+
+    def handle(self, *args, **options):
+        if fast_json.orjson is None:
+            self.stdout.write('orjson is not installed: FastJSONRenderer/Parser use the stdlib path.')
+        size = options['page_size']
+        pizzas = list(Pizza.objects.order_by('id')[:size])
+        orders = list(Order.objects.prefetch_related('items').order_by('-created_at', '-id')[:size])
+        if not pizzas or not orders:
+            raise CommandError('Needs pizzas and orders; run seed_data first.')
+        payloads = {
+            'menu page': _page(PizzaSerializer(pizzas, many=True).data),
+            'order page': _page(OrderSerializer(orders, many=True).data),
+            # Decimal and datetime values left for the renderer's encoder.
+            'order rows (values)': _page(list(
+                Order.objects.order_by('-id').values('id', 'status', 'total_price', 'created_at')[:size])),
+        }
+        self.stdout.write(f"{'payload':<28}{'bytes':>9}{'stdlib us':>12}{'fast us':>10}{'speedup':>9}  same")
+        for name, data in payloads.items():
+            expected = JSONRenderer().render(data)
+            same = FastJSONRenderer().render(data) == expected
+            self.report(f'render {name}', len(expected), same, options['repeat'],
+                        lambda: JSONRenderer().render(data), lambda: FastJSONRenderer().render(data))
+        for name, data in payloads.items():
+            # Round-trip the rendered page, standing in for a large request body.
+            raw = JSONRenderer().render(data)
+            same = JSONParser().parse(io.BytesIO(raw)) == FastJSONParser().parse(io.BytesIO(raw))
+            self.report(f'parse {name}', len(raw), same, options['repeat'],
+                        lambda: JSONParser().parse(io.BytesIO(raw)), lambda: FastJSONParser().parse(io.BytesIO(raw)))
+
+    def report(self, name, size, same, repeat, stdlib, fast):
+        number = max(1, 20_000_000 // max(size, 1) // 1000)
+        slow_us = min(timeit.repeat(stdlib, number=number, repeat=repeat)) / number * 1e6
+        fast_us = min(timeit.repeat(fast, number=number, repeat=repeat)) / number * 1e6
+        self.stdout.write(f'{name:<28}{size:>9}{slow_us:>12.1f}{fast_us:>10.1f}'
+                          f'{slow_us / fast_us:>8.1f}x  {"yes" if same else "NO"}')
@@ -0,0 +1,36 @@
+import secrets
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadtest
+from core.models import CustomUser
+
+ADMIN_USERNAME = 'loadtest-admin'
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the customer / delivery partner / admin API flows against a running "
+        "server and report per-endpoint throughput and p50/p95/p99 latency."
+    )
+
+    def add_arguments(self, parser):
+        loadtest.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        if options['mix'].get('admin') and not options['admin_username']:
+            options['admin_username'], options['admin_password'] = self.prepare_admin()
+        try:
+            loadtest.run_from_options(options, write=self.stdout.write)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+    def prepare_admin(self):
+        """The admin account the admin flows log in as, with a fresh password each run."""
+        password = secrets.token_urlsafe(16)
+        user, _ = CustomUser.objects.get_or_create(username=ADMIN_USERNAME, defaults={'role': 'admin'})
+        user.role = 'admin'
+        user.is_active = True
+        user.set_password(password)
+        user.save()
+        return ADMIN_USERNAME, password
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+
+from core.passwords import HashPool
+
+PASSWORD = 'dinner-rush-2025'
+
+
+def _pool_sizes(value):
+    return [int(n) for n in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password checks (logins) per second for each configured hasher "
+        "through core.passwords.HashPool at several pool sizes."
+    )
+
+    def add_arguments(self, parser):
+        cpus = os.cpu_count() or 2
+        parser.add_argument('--hashers', nargs='+',
+                            help='Hasher algorithms (default: the first hasher of every PASSWORD_HASHER_PROFILES entry).')
+        parser.add_argument('--pool-sizes', type=_pool_sizes,
+                            default=sorted({1, max(1, cpus // 2), cpus, 2 * cpus}),
+                            help='Comma-separated worker counts.')
+        parser.add_argument('--clients', type=int, default=64, help='Concurrent login attempts.')
+        parser.add_argument('--duration', type=float, default=3.0, help='Seconds per hasher and pool size.')
+
+    def handle(self, *args, **options):
+        algorithms = options['hashers'] or list(dict.fromkeys(
+            hashers.import_string(profile[0]).algorithm
+            for profile in getattr(settings, 'PASSWORD_HASHER_PROFILES', {'': settings.PASSWORD_HASHERS}).values()
+        ))
+        available = {h.algorithm: h for h in map(hashers.import_string, settings.PASSWORD_HASHERS)}
+        self.stdout.write(f"{'hasher':<16}{'pool':>6}{'logins/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+        for algorithm in algorithms:
+            hasher_cls = available.get(algorithm)
+            if hasher_cls is None:
+                self.stdout.write(f'{algorithm:<16} not in PASSWORD_HASHERS, skipped')
+                continue
+            try:
+                encoded = hasher_cls().encode(PASSWORD, hasher_cls().salt())
+            except (ValueError, ImportError) as exc:
+                self.stdout.write(f'{algorithm:<16} unavailable: {exc}')
+                continue
+            for size in options['pool_sizes']:
+                rate, p50, p95 = self.measure(encoded, size, options['clients'], options['duration'])
+                self.stdout.write(f'{algorithm:<16}{size:>6}{rate:>12,.1f}{p50:>10.1f}{p95:>10.1f}')
+
+    def measure(self, encoded, workers, clients, duration):
+        pool = HashPool(workers, max_pending=clients, timeout=None)
+        stop = threading.Event()
+        latencies, lock = [], threading.Lock()
+
+        def client():
+            mine = []
+            while not stop.is_set():
+                started = time.perf_counter()
+                pool.call(hashers.check_password, PASSWORD, encoded)
+                mine.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+        latencies.sort()
+        if not latencies:
+            return 0.0, 0.0, 0.0
+        return (len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000,
+                latencies[int(len(latencies) * 0.95) - 1] * 1000)
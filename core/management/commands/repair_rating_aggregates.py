@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core import menu_cache
+from core.models import Pizza, Rating
+
+
+class Command(BaseCommand):
+    help = "Recompute Pizza.rating_count / rating_sum from the Rating table in one UPDATE."
+
+    def handle(self, *args, **options):
+        per_pizza = Rating.objects.filter(pizza=OuterRef('pk')).order_by().values('pizza')
+        with transaction.atomic():
+            updated = Pizza.objects.update(
+                rating_count=Coalesce(Subquery(per_pizza.annotate(n=Count('id')).values('n')), Value(0),
+                                      output_field=IntegerField()),
+                rating_sum=Coalesce(Subquery(per_pizza.annotate(s=Sum('rating')).values('s')), Value(0),
+                                    output_field=IntegerField()),
+            )
+            transaction.on_commit(menu_cache.bump_version)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed rating aggregates for {updated} pizzas'))
@@ -0,0 +1,49 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.flat_serializers import FlatSerializer
+from core.models import Order, Pizza
+from core.serializers import OrderSerializer, PizzaSerializer
+
+
+def _sizes(value):
+    return [int(n) for n in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time list serialization (query included) through the model serializers "
+        "against core.flat_serializers for menus and order histories of several "
+        "sizes, and check both produce the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=_sizes, default=[100, 1000, 5000], help='Comma-separated row counts.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the best one is reported.')
+
+    def handle(self, *args, **options):
+        cases = {
+            'menu': (PizzaSerializer, Pizza.objects.order_by('id')),
+            'orders': (OrderSerializer, Order.objects.prefetch_related('items').order_by('-created_at', '-id')),
+        }
+        if not Pizza.objects.exists() or not Order.objects.exists():
+            raise CommandError('Needs pizzas and orders; run seed_data first.')
+        self.stdout.write(f"{'list':<10}{'rows':>7}{'model ms':>11}{'flat ms':>10}{'speedup':>9}  same")
+        for name, (serializer_class, queryset) in cases.items():
+            flat = FlatSerializer.for_serializer(serializer_class)
+            for size in options['sizes']:
+                def model():
+                    return serializer_class(queryset[:size], many=True).data
+
+                def flat_rows():
+                    return flat.serialize(flat.rows(queryset)[:size])
+
+                same = JSONRenderer().render(model()) == JSONRenderer().render(flat_rows())
+                rows = len(flat_rows())
+                number = max(1, 2000 // size)
+                model_ms = min(timeit.repeat(model, number=number, repeat=options['repeat'])) / number * 1000
+                flat_ms = min(timeit.repeat(flat_rows, number=number, repeat=options['repeat'])) / number * 1000
+                self.stdout.write(f'{name:<10}{rows:>7}{model_ms:>11.2f}{flat_ms:>10.2f}'
+                                  f'{model_ms / flat_ms:>8.1f}x  {"yes" if same else "NO"}')
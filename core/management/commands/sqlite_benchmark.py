@@ -0,0 +1,158 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = """
+CREATE TABLE orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total_price DECIMAL NOT NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX orders_user_created ON orders (user_id, created_at DESC);
+CREATE TABLE order_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL REFERENCES orders (id),
+    pizza_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL
+);
+CREATE INDEX order_items_order ON order_items (order_id);
+"""
+
+
+def _profiles():
+    tuned = settings.SQLITE_TUNED_OPTIONS
+    return {
+        # What Django does with no OPTIONS: rollback journal, deferred BEGIN,
+        # Python's default 5 s busy timeout.
+        'default': {'pragmas': [], 'begin': 'BEGIN'},
+        'tuned': {
+            'pragmas': [c.strip() for c in tuned['init_command'].split(';') if c.strip()],
+            'begin': f"BEGIN {tuned.get('transaction_mode') or ''}".strip(),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read/write throughput and lock errors of the stock SQLite setup "
+        "against SQLITE_TUNED_OPTIONS under concurrent checkout-style writers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile.')
+        parser.add_argument('--rows', type=int, default=20000, help='Orders to seed first.')
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, profile in _profiles().items():
+            results[name] = self.run_profile(profile, options)
+            r = results[name]
+            self.stdout.write(
+                f"{name:<8} reads/s {r['reads'] / r['seconds']:>10,.0f}   writes/s {r['writes'] / r['seconds']:>8,.0f}"
+                f"   locked errors {r['locked']:>5}   write p99 {r['write_p99_ms']:>8.1f} ms"
+            )
+        base, tuned = results['default'], results['tuned']
+        if base['writes']:
+            self.stdout.write(self.style.SUCCESS(
+                f"tuned/default: reads x{tuned['reads'] / max(base['reads'], 1):.2f}, "
+                f"writes x{tuned['writes'] / base['writes']:.2f}"
+            ))
+
+    def connect(self, path, profile):
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        for pragma in profile['pragmas']:
+            conn.execute(pragma)
+        return conn
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            setup = self.connect(path, profile)
+            setup.executescript(SCHEMA)
+            setup.execute('BEGIN')
+            setup.executemany(
+                "INSERT INTO orders (user_id, status, total_price, created_at) VALUES (?, 'delivered', 20, datetime('now', ?))",
+                [(i % 1000, f'-{i} seconds') for i in range(options['rows'])],
+            )
+            setup.execute('COMMIT')
+            setup.close()
+
+            stop = threading.Event()
+            lock = threading.Lock()
+            totals = {'reads': 0, 'writes': 0, 'locked': 0, 'write_latencies': []}
+
+            def reader(seed):
+                rng = random.Random(seed)
+                conn = self.connect(path, profile)
+                reads = locked = 0
+                while not stop.is_set():
+                    try:
+                        conn.execute(
+                            'SELECT o.id, o.status, i.pizza_id, i.quantity FROM orders o '
+                            'LEFT JOIN order_items i ON i.order_id = o.id '
+                            'WHERE o.user_id = ? ORDER BY o.created_at DESC LIMIT 20',
+                            (rng.randrange(1000),),
+                        ).fetchall()
+                        reads += 1
+                    except sqlite3.OperationalError:
+                        locked += 1
+                conn.close()
+                with lock:
+                    totals['reads'] += reads
+                    totals['locked'] += locked
+
+            def writer(seed):
+                # Same shape as checkout: read inside the transaction, then write.
+                rng = random.Random(seed)
+                conn = self.connect(path, profile)
+                writes = locked = 0
+                latencies = []
+                while not stop.is_set():
+                    user_id = rng.randrange(1000)
+                    started = time.perf_counter()
+                    try:
+                        conn.execute(profile['begin'])
+                        conn.execute('SELECT COUNT(*) FROM orders WHERE user_id = ?', (user_id,)).fetchone()
+                        cur = conn.execute(
+                            "INSERT INTO orders (user_id, status, total_price, created_at) "
+                            "VALUES (?, 'pending', 20, datetime('now'))", (user_id,))
+                        conn.executemany(
+                            'INSERT INTO order_items (order_id, pizza_id, quantity) VALUES (?, ?, ?)',
+                            [(cur.lastrowid, rng.randrange(12), 1) for _ in range(3)],
+                        )
+                        conn.execute('COMMIT')
+                        writes += 1
+                        latencies.append(time.perf_counter() - started)
+                    except sqlite3.OperationalError:
+                        locked += 1
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                conn.close()
+                with lock:
+                    totals['writes'] += writes
+                    totals['locked'] += locked
+                    totals['write_latencies'].extend(latencies)
+
+            threads = [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+            threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(options['writers'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(options['duration'])
+            stop.set()
+            for thread in threads:
+                thread.join()
+            latencies = sorted(totals.pop('write_latencies'))
+            totals['seconds'] = time.perf_counter() - started
+            totals['write_p99_ms'] = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0
+            return totals
@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+# The menu version lives under a single key with no expiry. Every cached menu
+# payload is keyed by that version, so bumping it invalidates all of them at
+# once without having to know which query strings were cached.
+VERSION_KEY = 'menu:version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'MENU_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'MENU_CACHE_TIMEOUT', 300)
+
+
+def _initial_version():
+    # Seed from the clock rather than 1 so a version that was evicted (or a
+    # restarted local-memory cache) never collides with entries still held by
+    # a shared backend.
+    return int(time.time() * 1000)
+
+
+def get_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _initial_version(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        return cache.get(VERSION_KEY)
+
+
+def _entry_key(version, request):
+    # The path is part of the key because the cached page's links point back
+    # at it (the sync and async menus share one version).
+    target = f"{request.path}?{request.META.get('QUERY_STRING', '')}"
+    digest = hashlib.sha1(target.encode()).hexdigest()[:16]
+    return f'menu:v{version}:{digest}'
+
+
+def get_entry(request):
+    """Return ``(key, entry)`` for the current menu version and query string."""
+    key = _entry_key(get_version(), request)
+    return key, get_cache().get(key)
+
+
+async def aget_entry(request):
+    key = _entry_key(await aget_version(), request)
+    return key, await get_cache().aget(key)
+
+
+def _new_entry(key, data):
+    # No Last-Modified: it has one-second precision, so a menu changed twice
+    # within a second would look unmodified to If-Modified-Since. The ETag
+    # names the version.
+    return {
+        'data': data,
+        'etag': '"%s"' % key.replace(':', '-'),
+    }
+
+
+def store_entry(key, data):
+    entry = _new_entry(key, data)
+    get_cache().set(key, entry, timeout=get_timeout())
+    return entry
+
+
+async def astore_entry(key, data):
+    entry = _new_entry(key, data)
+    await get_cache().aset(key, entry, timeout=get_timeout())
+    return entry
+
+
+def finalize(request, response, entry):
+    """Stamp validators on ``response`` and turn it into a 304 when they match."""
+    response['ETag'] = entry['etag']
+    # The entry holds data, rendered per request in the negotiated format,
+    # while the ETag is the same for every format.
+    patch_vary_headers(response, ['Accept'])
+    return get_conditional_response(request, etag=entry['etag'], response=response)
@@ -0,0 +1,182 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('core.requests')
+
+_metrics = ContextVar('request_metrics', default=None)
+
+# Collapse IN (%s, %s, ...) so the same query over different id lists counts
+# as one shape.
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+# Savepoint bookkeeping depends on how deeply the request is nested in
+# atomic blocks (tests add a level); it is timed but not counted.
+_SAVEPOINT = re.compile(r'(?:RELEASE |ROLLBACK TO )?SAVEPOINT ')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        self.shapes = Counter()
+        self.view_class = None
+        # False when the request's queries run where the wrapper can't see them
+        self.db_measured = True
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            if not _SAVEPOINT.match(sql):
+                self.queries += 1
+                self.shapes[_IN_LIST.sub('IN (...)', sql)] += 1
+
+    def duplicates(self, threshold):
+        return {sql: n for sql, n in self.shapes.items() if n >= threshold}
+
+
+@contextmanager
+def serializer_timer():
+    """Count the enclosed block as serializer time of the current request."""
+    metrics = _metrics.get()
+    if metrics is None:
+        yield
+        return
+    # Nested serializers run inside the outer one; only time the outermost.
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_seconds += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """
+    Counts a serializer's ``.data`` as serializer time of the current request.
+    Mix it into the serializers views respond with; fields nested inside them
+    are covered by the outer one, and list views time themselves through
+    ``FlatSerializer``.
+    """
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records query count, DB time, serializer time and total view time per
+    request. Emits them as a ``Server-Timing`` header and one structured log
+    line on ``core.requests``, flags repeated query shapes (N+1), and checks
+    the view's optional ``query_budget``.
+
+    With ``REQUEST_INSTRUMENTATION`` off, Django drops it from the chain at
+    startup, so it costs nothing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                request._request_metrics = metrics
+                response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        # Async views run their ORM calls on sync_to_async threads, out of
+        # reach of the execute wrapper: queries and DB time are reported as
+        # unmeasured (and no query budget applies) rather than as zero.
+        metrics = RequestMetrics()
+        metrics.db_measured = False
+        request._request_metrics = metrics
+        token = _metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_request_metrics', None)
+        if metrics is not None:
+            metrics.view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+
+    def finish(self, request, response, metrics, total_seconds):
+        threshold = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 3)
+        duplicates = metrics.duplicates(threshold)
+        view = metrics.view_class
+        budget = getattr(view, 'query_budget', None)
+
+        timings = [
+            f'serializer;dur={metrics.serializer_seconds * 1000:.2f}',
+            f'view;dur={total_seconds * 1000:.2f}',
+        ]
+        if metrics.db_measured:
+            timings.insert(0, f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.queries} queries"')
+        response['Server-Timing'] = ', '.join(timings)
+        if duplicates:
+            response['X-Duplicate-Queries'] = str(sum(duplicates.values()))
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': view.__name__ if view else None,
+            'queries': metrics.queries if metrics.db_measured else None,
+            'db_ms': round(metrics.db_seconds * 1000, 2) if metrics.db_measured else None,
+            'serializer_ms': round(metrics.serializer_seconds * 1000, 2),
+            'total_ms': round(total_seconds * 1000, 2),
+        }
+        if duplicates:
+            record['duplicate_queries'] = duplicates
+        over_budget = metrics.db_measured and budget is not None and metrics.queries > budget
+        if over_budget:
+            record['query_budget'] = budget
+        logger.log(logging.WARNING if duplicates or over_budget else logging.INFO, json.dumps(record))
+
+        if over_budget and getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(
+                f'{record["view"]} ran {metrics.queries} queries for {request.method} {request.path}; '
+                f'budget is {budget}'
+            )
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:49
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    # Older code could create the same (cart, pizza) line twice; fold those
+    # into one row so the unique constraint can be added.
+    CartItem = apps.get_model('core', 'CartItem')
+    duplicates = (CartItem.objects.values('cart_id', 'pizza_id')
+                  .annotate(n=Count('id'), keep=Min('id'), total=Sum('quantity'))
+                  .filter(n__gt=1))
+    for row in duplicates:
+        lines = CartItem.objects.filter(cart_id=row['cart_id'], pizza_id=row['pizza_id'])
+        lines.filter(id=row['keep']).update(quantity=row['total'])
+        lines.exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_customuser_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'pizza'), name='unique_cart_pizza'),
+        ),
+    ]
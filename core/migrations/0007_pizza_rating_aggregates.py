@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:53
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Pizza = apps.get_model('core', 'Pizza')
+    Rating = apps.get_model('core', 'Rating')
+    per_pizza = Rating.objects.filter(pizza=OuterRef('pk')).order_by().values('pizza')
+    Pizza.objects.update(
+        rating_count=Coalesce(Subquery(per_pizza.annotate(n=Count('id')).values('n')), Value(0),
+                              output_field=IntegerField()),
+        rating_sum=Coalesce(Subquery(per_pizza.annotate(s=Sum('rating')).values('s')), Value(0),
+                            output_field=IntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pizza',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pizza',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_order_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_mode', models.CharField(choices=[('cod', 'Cash on Delivery'), ('online', 'Online Payment')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('pizza', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.pizza')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'pizza', 'payment_mode'), name='unique_daily_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_mode', models.CharField(choices=[('cod', 'Cash on Delivery'), ('online', 'Online Payment')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('hour', models.DateTimeField()),
+                ('pizza', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.pizza')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hour', 'pizza', 'payment_mode'), name='unique_hourly_sales')],
+            },
+        ),
+    ]
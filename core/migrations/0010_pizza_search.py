@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from core import search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(search.install, search.uninstall),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_order_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverycomment',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='deliverycomment',
+            constraint=models.UniqueConstraint(fields=('partner', 'client_id'), name='unique_comment_client_id'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_deliverycomment_client_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrders',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_mode', models.CharField(choices=[('cod', 'Cash on Delivery'), ('online', 'Online Payment')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_mode'), name='unique_daily_orders')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyOrders',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_mode', models.CharField(choices=[('cod', 'Cash on Delivery'), ('online', 'Online Payment')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('hour', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hour', 'payment_mode'), name='unique_hourly_orders')],
+            },
+        ),
+    ]
@@ -10,6 +10,18 @@ class CustomUser(AbstractUser):
         ('admin', 'Admin'),
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    # Embedded in issued JWTs; bumping it revokes every outstanding token
+    token_version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets core.signals revoke tokens when a save changes what they grant.
+        instance._loaded_auth = instance.auth_state()
+        return instance
+
+    def auth_state(self):
+        return (self.__dict__.get('role'), self.__dict__.get('is_active'), self.__dict__.get('password'))
 
 # Pizza model
 class Pizza(models.Model):
@@ -22,6 +34,9 @@ class Pizza(models.Model):
     price = models.DecimalField(max_digits=6, decimal_places=2)
     type = models.CharField(max_length=10, choices=PIZZA_TYPE_CHOICES)
     is_available = models.BooleanField(default=True)
+    # Maintained by core.signals on every Rating write; avg = sum / count
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -36,6 +51,11 @@ class CartItem(models.Model):
     pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'pizza'], name='unique_cart_pizza'),
+        ]
+
 # Order model
 class Order(models.Model):
     STATUS_CHOICES = (
@@ -62,11 +82,53 @@ class Order(models.Model):
     payment_mode = models.CharField(max_length=20, choices=PAYMENT_CHOICES)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Client-supplied Idempotency-Key of the checkout that created this order
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    # Bumped by every status transition (core.order_status)
+    version = models.PositiveIntegerField(default=0)
+
+    ACTIVE_STATUSES = ('pending', 'preparing', 'out_for_delivery')
+    # Where each status may go next; delivered and cancelled are final.
+    TRANSITIONS = {
+        'pending': ('preparing', 'cancelled'),
+        'preparing': ('out_for_delivery', 'cancelled'),
+        'out_for_delivery': ('delivered', 'cancelled'),
+        'delivered': (),
+        'cancelled': (),
+    }
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_order_idempotency_key'),
+        ]
+        indexes = [
+            # order history: orders for a user, newest first
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # partner work queue: orders for a partner with status in (...)
+            models.Index(fields=['delivery_partner', 'status'], name='order_partner_status_idx'),
+            # admin date hierarchy and date-range exports: MIN/MAX probes and
+            # range scans over created_at
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            # kitchen/dispatch queue; finished orders never enter this index.
+            # PostgreSQL matches it for parameterized status filters, SQLite only
+            # when the condition appears with literal values.
+            models.Index(fields=['status', 'created_at'], name='order_active_status_idx',
+                         condition=models.Q(status__in=['pending', 'preparing', 'out_for_delivery'])),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets core.signals tell which status a save moves the order out of.
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
+    # Unit price at checkout time; later menu price changes don't touch it
+    price = models.DecimalField(max_digits=6, decimal_places=2)
 
 # DeliveryComment model
 class DeliveryComment(models.Model):
@@ -74,10 +136,94 @@ class DeliveryComment(models.Model):
     partner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     comment = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Id the partner app gave the comment while offline; resending it is a no-op
+    client_id = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['partner', 'client_id'], name='unique_comment_client_id'),
+        ]
+        indexes = [
+            models.Index(fields=['order', 'timestamp'], name='comment_order_ts_idx'),
+        ]
 
 # Rating model
 class Rating(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE)
+    pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE, related_name='ratings')
     rating = models.PositiveIntegerField()
     comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['pizza', 'created_at'], name='rating_pizza_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so an edit can adjust the pizza aggregates
+        # by the difference instead of recounting.
+        instance._loaded = (instance.__dict__.get('pizza_id'), instance.__dict__.get('rating'))
+        return instance
+
+# Sales rollups. Updated by core.rollups when an order becomes (or stops being)
+# delivered or cancelled, and rebuilt by the backfill_sales_rollups command.
+# Orders are bucketed by created_at.
+class SalesRollup(models.Model):
+    pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE, related_name='+')
+    payment_mode = models.CharField(max_length=20, choices=Order.PAYMENT_CHOICES)
+    # Delivered orders containing the pizza, and the units and revenue they
+    # brought. Not summable across pizzas: a two-pizza order counts twice;
+    # DailyOrders/HourlyOrders hold the order counts for that.
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Cancelled orders containing the pizza
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+class DailySales(SalesRollup):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'pizza', 'payment_mode'], name='unique_daily_sales'),
+        ]
+
+class HourlySales(SalesRollup):
+    hour = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'pizza', 'payment_mode'], name='unique_hourly_sales'),
+        ]
+
+# Delivered and cancelled orders per period and payment mode, whatever pizzas
+# they contain, kept alongside the per-pizza rollups.
+class OrderRollup(models.Model):
+    payment_mode = models.CharField(max_length=20, choices=Order.PAYMENT_CHOICES)
+    orders = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+class DailyOrders(OrderRollup):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'payment_mode'], name='unique_daily_orders'),
+        ]
+
+class HourlyOrders(OrderRollup):
+    hour = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'payment_mode'], name='unique_hourly_orders'),
+        ]
@@ -0,0 +1,127 @@
+from django.db import connection, transaction
+from django.db.models import F
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import events, rollups
+from .models import Order
+
+class OrderStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    # The version the client last saw; omit it to apply the transition to
+    # whatever the current version is.
+    version = serializers.IntegerField(min_value=0, required=False)
+
+#SERVICE
+
+class TransitionConflict(Exception):
+    def __init__(self, current_status, version):
+        super().__init__(current_status, version)
+        self.current_status = current_status
+        self.version = version
+
+
+def _allowed_from(new_status):
+    return [old for old, targets in Order.TRANSITIONS.items() if new_status in targets]
+
+
+def _update_returning(order_id, new_status, allowed_from, partner_id, expected_version):
+    """The conditional UPDATE in one statement; ``(delivery_partner_id, version)`` or None."""
+    quote = connection.ops.quote_name
+    sql = (
+        f'UPDATE {quote(Order._meta.db_table)} SET {quote("status")} = %s, {quote("version")} = {quote("version")} + 1'
+        f' WHERE {quote("id")} = %s AND {quote("status")} IN ({", ".join(["%s"] * len(allowed_from))})'
+    )
+    params = [new_status, order_id, *allowed_from]
+    if partner_id is not None:
+        sql += f' AND {quote("delivery_partner_id")} = %s'
+        params.append(partner_id)
+    if expected_version is not None:
+        sql += f' AND {quote("version")} = %s'
+        params.append(expected_version)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + f' RETURNING {quote("delivery_partner_id")}, {quote("version")}', params)
+        return cursor.fetchone()
+
+
+def _can_update_returning():
+    # UPDATE ... RETURNING: PostgreSQL, and SQLite from 3.35 (Django 5.2 runs
+    # on 3.31+). Django only reports RETURNING support for INSERT; the two
+    # arrived together on both backends.
+    return connection.vendor in ('sqlite', 'postgresql') and connection.features.can_return_columns_from_insert
+
+
+def transition(order_id, new_status, partner_id=None, expected_version=None):
+    """
+    Move an order to ``new_status`` if ``Order.TRANSITIONS`` allows it from
+    the status it has right now, and return ``(delivery_partner_id, version)``.
+
+    The check and the write are one conditional UPDATE (status among the
+    allowed sources, and optionally the caller's partner and the version it
+    last saw), so concurrent callers cannot both win the same transition and
+    no row lock or prior read is needed. SQLite and PostgreSQL return the new
+    row with ``RETURNING`` (SQLite from 3.35); other backends and older SQLite
+    read it back after a successful update. When nothing matched, the row is read once to tell a missing
+    order (``Order.DoesNotExist``) from a refused transition
+    (``TransitionConflict``).
+    """
+    orders = Order.objects.filter(pk=order_id)
+    if partner_id is not None:
+        orders = orders.filter(delivery_partner_id=partner_id)
+    allowed_from = _allowed_from(new_status)
+    with transaction.atomic():
+        row = None
+        if allowed_from and _can_update_returning():
+            row = _update_returning(order_id, new_status, allowed_from, partner_id, expected_version)
+        elif allowed_from:
+            matching = orders.filter(status__in=allowed_from)
+            if expected_version is not None:
+                matching = matching.filter(version=expected_version)
+            if matching.update(status=new_status, version=F('version') + 1):
+                row = orders.values_list('delivery_partner_id', 'version').get()
+        if row is None:
+            current = orders.values_list('status', 'version').first()
+            if current is None:
+                raise Order.DoesNotExist()
+            raise TransitionConflict(*current)
+        # Delivered and cancelled are final, so the order can only be
+        # entering them here, never leaving.
+        rollups.record_transition(order_id, None, new_status)
+        transaction.on_commit(lambda: events.publish_order_status(order_id, new_status, *row))
+    return row
+
+#VIEW
+
+class OrderStatusUpdateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, pk):
+        serializer = OrderStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            if 'status' in serializer.errors:
+                return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        new_status = serializer.validated_data['status']
+
+        if request.user.role == 'delivery_partner':
+            partner_id = request.user.id
+        elif request.user.role == 'admin':
+            partner_id = None
+        else:
+            return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            _, version = transition(pk, new_status, partner_id, serializer.validated_data.get('version'))
+        except Order.DoesNotExist:
+            return Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+        except TransitionConflict as e:
+            if new_status in Order.TRANSITIONS[e.current_status]:
+                error = f'Order has changed; it is at version {e.version}'
+            else:
+                error = f'Cannot move order from {e.current_status} to {new_status}'
+            return Response(
+                {'error': error, 'status': e.current_status, 'version': e.version},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({'id': pk, 'status': new_status, 'version': version})
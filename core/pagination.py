@@ -0,0 +1,109 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over an indexed ordering. Each page is a range scan from
+    the encoded position, so deep pages cost the same as the first one.
+
+    ``paginate_queryset`` is DRF's, split around the one query it runs so
+    async views can fetch the page with ``apaginate_queryset`` instead.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.get_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.set_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        window = self.get_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.set_page([obj async for obj in window])
+
+    def get_window(self, queryset, request, view=None):
+        """The page plus one row, as an unevaluated queryset (None when unpaginated)."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, self.reverse, self.current_position) = (0, False, None)
+        else:
+            (offset, self.reverse, self.current_position) = self.cursor
+        self.offset = offset
+
+        if self.reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+            # (cursor reversed) XOR (queryset reversed)
+            if self.cursor.reverse != is_reversed:
+                queryset = queryset.filter(**{order_attr + '__lt': self.current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + '__gt': self.current_position})
+
+        # One extra row tells whether another page follows.
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_page(self, results):
+        """Finish pagination from the rows ``get_window`` selected."""
+        self.page = list(results[:self.page_size])
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        has_current_position = self.current_position is not None or self.offset > 0
+        if self.reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = has_current_position
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = self.current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = has_current_position
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = self.current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class MenuPagination(KeysetPagination):
+    ordering = 'id'
+
+
+class OrderPagination(KeysetPagination):
+    # Newest first; id breaks ties between orders created in the same instant.
+    ordering = ('-created_at', '-id')
+
+
+class RatingPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
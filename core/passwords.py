@@ -0,0 +1,113 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import ModelBackend
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class HashPoolBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'hash_pool_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns this into a Retry-After header.
+        self.wait = wait
+
+
+class HashPool:
+    """
+    Runs password hashing on a fixed number of threads. PBKDF2, scrypt and
+    argon2 all release the GIL while hashing, so threads use every core
+    without oversubscribing it however many requests arrive at once.
+
+    At most ``workers + max_pending`` calls are admitted; a caller that
+    cannot get a slot within ``timeout`` seconds gets ``HashPoolBusy`` (503)
+    instead of queueing behind everyone else. Callers block on the result,
+    which works the same under WSGI and under ASGI (where Django runs each
+    sync view in its own thread).
+    """
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def call(self, fn, *args):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise HashPoolBusy(wait=max(1, round(self.timeout)))
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'HASH_POOL_WORKERS', None) or os.cpu_count() or 2
+                _pool = HashPool(
+                    workers,
+                    getattr(settings, 'HASH_POOL_MAX_PENDING', 4 * workers),
+                    getattr(settings, 'HASH_POOL_TIMEOUT', 2.0),
+                )
+    return _pool
+
+
+def make_password(raw_password):
+    return get_pool().call(hashers.make_password, raw_password)
+
+
+def check_password(user, raw_password):
+    """
+    ``user.check_password`` with the hashing done on the pool. On success, a
+    hash made by anything other than the first ``PASSWORD_HASHERS`` entry (or
+    with outdated parameters) is replaced, so switching the hasher profile
+    migrates users as they log in. The new hash is written with a queryset
+    update: it is the same password, so it must not revoke the user's tokens
+    the way a password change saved on the model does.
+    """
+    encoded = user.password
+    if raw_password is None or not hashers.is_password_usable(encoded):
+        return False
+    if not get_pool().call(hashers.check_password, raw_password, encoded):
+        return False
+    preferred = hashers.get_hasher()
+    if hashers.identify_hasher(encoded).algorithm != preferred.algorithm or preferred.must_update(encoded):
+        user.password = make_password(raw_password)
+        type(user)._default_manager.filter(pk=user.pk).update(password=user.password)
+        # A later save of this instance (last_login) must not see a change either.
+        user._loaded_auth = user.auth_state()
+    return True
+
+
+class PooledModelBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            make_password(password)
+            return None
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
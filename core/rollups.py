@@ -0,0 +1,217 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import DailyOrders, DailySales, HourlyOrders, HourlySales, Order, OrderItem
+
+REVENUE = DecimalField(max_digits=12, decimal_places=2)
+CENTS = Decimal('0.01')
+FINAL_STATUSES = ('delivered', 'cancelled')
+MAX_HOURLY_DAYS = 92
+
+GROUP_FIELDS = {'period': None, 'pizza': 'pizza_id', 'payment_mode': 'payment_mode'}
+
+
+class SalesQuerySerializer(serializers.Serializer):
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=['day', 'hour'], default='day')
+    group_by = serializers.MultipleChoiceField(choices=list(GROUP_FIELDS), required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('until', timezone.localdate())
+        attrs.setdefault('since', attrs['until'] - timedelta(days=29))
+        if attrs['since'] > attrs['until']:
+            raise serializers.ValidationError('since must not be after until')
+        if attrs['granularity'] == 'hour' and (attrs['until'] - attrs['since']).days >= MAX_HOURLY_DAYS:
+            raise serializers.ValidationError(f'hourly ranges are limited to {MAX_HOURLY_DAYS} days')
+        attrs['group_by'] = [g for g in GROUP_FIELDS if g in (attrs.get('group_by') or {'period'})]
+        return attrs
+
+#SERVICE
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _apply(model, bucket, payment_mode, lines, sold, cancelled):
+    # Same shape as cart.add_items: make sure every row exists, then one
+    # UPDATE adds the per-pizza deltas.
+    model.objects.bulk_create(
+        [model(pizza_id=pizza_id, payment_mode=payment_mode, **bucket) for pizza_id in lines],
+        ignore_conflicts=True,
+    )
+    model.objects.filter(pizza_id__in=list(lines), payment_mode=payment_mode, **bucket).update(
+        orders=F('orders') + sold,
+        units=F('units') + Case(*[When(pizza_id=p, then=Value(units * sold)) for p, (units, _) in lines.items()]),
+        revenue=F('revenue') + Case(
+            *[When(pizza_id=p, then=Value(revenue * sold)) for p, (_, revenue) in lines.items()],
+            output_field=REVENUE,
+        ),
+        cancelled=F('cancelled') + cancelled,
+    )
+
+
+def _apply_orders(model, bucket, payment_mode, sold, cancelled):
+    model.objects.bulk_create([model(payment_mode=payment_mode, **bucket)], ignore_conflicts=True)
+    model.objects.filter(payment_mode=payment_mode, **bucket).update(
+        orders=F('orders') + sold, cancelled=F('cancelled') + cancelled,
+    )
+
+
+def record_transition(order_id, old_status, new_status):
+    """
+    Move an order's contribution in the rollups after its status changed
+    from ``old_status`` to ``new_status``. Nothing happens (and no query runs)
+    unless delivered or cancelled is entered or left. Call it inside the
+    transaction that changes the status.
+    """
+    sold = (new_status == 'delivered') - (old_status == 'delivered')
+    cancelled = (new_status == 'cancelled') - (old_status == 'cancelled')
+    if not (sold or cancelled):
+        return
+    rows = list(OrderItem.objects.filter(order_id=order_id).values_list(
+        'pizza_id', 'quantity', 'price', 'order__created_at', 'order__payment_mode'))
+    if not rows:
+        return
+    lines = defaultdict(lambda: (0, Decimal('0')))
+    for pizza_id, quantity, price, _, _ in rows:
+        units, revenue = lines[pizza_id]
+        lines[pizza_id] = (units + quantity, revenue + quantity * price)
+    created_at, payment_mode = rows[0][3], rows[0][4]
+    hour = timezone.localtime(created_at).replace(minute=0, second=0, microsecond=0)
+    _apply(HourlySales, {'hour': hour}, payment_mode, lines, sold, cancelled)
+    _apply(DailySales, {'day': hour.date()}, payment_mode, lines, sold, cancelled)
+    _apply_orders(HourlyOrders, {'hour': hour}, payment_mode, sold, cancelled)
+    _apply_orders(DailyOrders, {'day': hour.date()}, payment_mode, sold, cancelled)
+
+
+def rebuild(first_day, last_day):
+    """
+    Recompute the rollups for orders created from ``first_day`` to
+    ``last_day`` (inclusive) from scratch. Replaces rather than adds, so a
+    range can be rebuilt as often as needed. Returns the number of hourly rows.
+    """
+    start, end = _start_of(first_day), _start_of(last_day + timedelta(days=1))
+    delivered, cancelled = Q(order__status='delivered'), Q(order__status='cancelled')
+    rows = (
+        OrderItem.objects
+        .filter(order__created_at__gte=start, order__created_at__lt=end, order__status__in=FINAL_STATUSES)
+        .values('pizza_id', hour=TruncHour('order__created_at'), payment_mode=F('order__payment_mode'))
+        .annotate(
+            # Distinct orders: record_transition counts an order once per
+            # pizza however many lines it has for it.
+            orders=Count('order', distinct=True, filter=delivered),
+            units=Coalesce(Sum('quantity', filter=delivered), 0),
+            revenue=Coalesce(Sum(F('quantity') * F('price'), filter=delivered, output_field=REVENUE),
+                             Value(Decimal('0'))),
+            cancelled=Count('order', distinct=True, filter=cancelled),
+        )
+        .order_by()
+    )
+    hourly = [HourlySales(**row) for row in rows]
+    daily = {}
+    for row in hourly:
+        key = (timezone.localtime(row.hour).date(), row.pizza_id, row.payment_mode)
+        day = daily.setdefault(key, DailySales(day=key[0], pizza_id=key[1], payment_mode=key[2], revenue=Decimal('0')))
+        day.orders += row.orders
+        day.units += row.units
+        day.revenue += row.revenue
+        day.cancelled += row.cancelled
+    # Orders without items never reach the per-pizza rollups, so they are
+    # left out of the order counts too.
+    order_rows = (
+        Order.objects
+        .filter(created_at__gte=start, created_at__lt=end, status__in=FINAL_STATUSES, items__isnull=False)
+        .values('payment_mode', hour=TruncHour('created_at'))
+        .annotate(
+            orders=Count('id', distinct=True, filter=Q(status='delivered')),
+            cancelled=Count('id', distinct=True, filter=Q(status='cancelled')),
+        )
+        .order_by()
+    )
+    hourly_orders = [HourlyOrders(**row) for row in order_rows]
+    daily_orders = {}
+    for row in hourly_orders:
+        key = (timezone.localtime(row.hour).date(), row.payment_mode)
+        day = daily_orders.setdefault(key, DailyOrders(day=key[0], payment_mode=key[1]))
+        day.orders += row.orders
+        day.cancelled += row.cancelled
+    with transaction.atomic():
+        for model in (HourlySales, HourlyOrders):
+            model.objects.filter(hour__gte=start, hour__lt=end).delete()
+        for model in (DailySales, DailyOrders):
+            model.objects.filter(day__gte=first_day, day__lte=last_day).delete()
+        HourlySales.objects.bulk_create(hourly, batch_size=1000)
+        DailySales.objects.bulk_create(daily.values(), batch_size=1000)
+        HourlyOrders.objects.bulk_create(hourly_orders, batch_size=1000)
+        DailyOrders.objects.bulk_create(daily_orders.values(), batch_size=1000)
+    return len(hourly)
+
+
+def _in_range(model, since, until, granularity):
+    if granularity == 'hour':
+        return model.objects.filter(hour__gte=_start_of(since), hour__lt=_start_of(until + timedelta(days=1)))
+    return model.objects.filter(day__gte=since, day__lte=until)
+
+
+def sales_report(since, until, granularity='day', group_by=('period',)):
+    """
+    Sum the rollups over ``since``..``until`` grouped by ``group_by``. Grouped
+    by pizza, ``orders`` and ``cancelled`` count the orders containing each
+    pizza; otherwise they come from the order rollups, so an order with
+    several pizzas counts once.
+    """
+    sales, counts = (HourlySales, HourlyOrders) if granularity == 'hour' else (DailySales, DailyOrders)
+    fields = [GROUP_FIELDS[g] or granularity for g in group_by]
+    totals = {'units': Sum('units'), 'revenue': Sum('revenue')}
+    if 'pizza' in group_by:
+        totals.update(orders=Sum('orders'), cancelled=Sum('cancelled'))
+    rows = {
+        tuple(row[f] for f in fields): row
+        for row in _in_range(sales, since, until, granularity).values(*fields).annotate(**totals)
+    }
+    if 'pizza' not in group_by:
+        order_rows = (_in_range(counts, since, until, granularity).values(*fields)
+                      .annotate(orders=Sum('orders'), cancelled=Sum('cancelled')))
+        for row in order_rows:
+            rows.setdefault(tuple(row[f] for f in fields), {}).update(row)
+    results = []
+    for key in sorted(rows):
+        row = {field: rows[key].get(field, 0) for field in (*fields, 'orders', 'units', 'revenue', 'cancelled')}
+        if granularity in row:
+            row['period'] = row.pop(granularity).isoformat()
+        # SQLite sums decimals without their scale ('22' for 22.00).
+        row['revenue'] = str(Decimal(row['revenue'] or 0).quantize(CENTS))
+        results.append(row)
+    return {
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        'granularity': granularity,
+        'units': sum(r['units'] for r in results),
+        'revenue': str(sum((Decimal(r['revenue']) for r in results), Decimal('0.00'))),
+        'results': results,
+    }
+
+#VIEW
+
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .permissions import IsAdminUser
+
+
+class SalesAnalyticsView(APIView):
+    permission_classes = [IsAdminUser]
+    query_budget = 2
+
+    def get(self, request):
+        params = SalesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(sales_report(**params.validated_data))
@@ -0,0 +1,79 @@
+"""
+Full-text search over Pizza.name / Pizza.description.
+
+SQLite: an external-content FTS5 table, ``core_pizza_fts``, kept in sync by
+triggers on ``core_pizza``. PostgreSQL: a GIN index over the same tsvector
+expression the search filter uses. Both are created by ``install`` from a
+migration. On SQLite, a later migration that makes Django rebuild
+``core_pizza`` (most AlterField/RemoveField operations) drops the triggers
+with the old table, so it has to call ``install`` again.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'core_pizza_fts'
+
+PG_DOCUMENT = "to_tsvector('english', name || ' ' || description)"
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, description, content='core_pizza', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_pizza BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_pizza BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    # Rating aggregate updates don't touch these columns, so they skip the index.
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON core_pizza BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+PG_INSTALL = [f'CREATE INDEX IF NOT EXISTS pizza_search_idx ON core_pizza USING GIN ({PG_DOCUMENT})']
+PG_UNINSTALL = ['DROP INDEX IF EXISTS pizza_search_idx']
+
+_WORD = re.compile(r'\w+')
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def install(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_INSTALL, 'postgresql': PG_INSTALL})
+
+
+def uninstall(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_UNINSTALL, 'postgresql': PG_UNINSTALL})
+
+
+def search(queryset, text):
+    """
+    Narrow a Pizza queryset to rows matching every word of ``text``. On
+    SQLite the last word is also matched as a prefix, for search-as-you-type.
+    Other backends fall back to a (non-indexed) icontains per word.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return queryset
+    if connection.vendor == 'sqlite':
+        # Each word quoted, so user input can never be FTS5 query syntax.
+        match = ' '.join(f'"{w}"' for w in words) + '*'
+        return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+    if connection.vendor == 'postgresql':
+        return queryset.filter(RawSQL(
+            f"{PG_DOCUMENT} @@ plainto_tsquery('english', %s)", [' '.join(words)], output_field=BooleanField()))
+    for word in words:
+        queryset = queryset.filter(Q(name__icontains=word) | Q(description__icontains=word))
+    return queryset
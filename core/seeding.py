@@ -0,0 +1,235 @@
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import BooleanField, CharField, ForeignKey, IntegerField, Max, TextField
+
+from .models import CustomUser, DeliveryComment, Order, OrderItem, Pizza, Rating
+
+# Relative order volume per hour of day (UTC): lunch and dinner peaks.
+HOURLY_WEIGHTS = [
+    1, 1, 0, 0, 0, 0, 1, 2, 3, 4, 6, 12,
+    20, 18, 9, 5, 5, 8, 15, 22, 20, 12, 6, 3,
+]
+DEFAULT_END = datetime(2025, 7, 1, tzinfo=dt_timezone.utc)
+SEED_PASSWORD = 'pizza-seed-1234'
+# Order.version after the shortest run of transitions reaching each status.
+STATUS_VERSIONS = {'pending': 0, 'preparing': 1, 'out_for_delivery': 2, 'delivered': 3, 'cancelled': 1}
+
+MENU = [
+    ('Margherita', 'veg', '7.99'), ('Farmhouse', 'veg', '9.49'), ('Peppy Paneer', 'veg', '9.99'),
+    ('Veggie Supreme', 'veg', '10.49'), ('Four Cheese', 'veg', '10.99'), ('Mexican Green Wave', 'veg', '9.29'),
+    ('Pepperoni', 'non-veg', '10.99'), ('Chicken Tikka', 'non-veg', '11.49'), ('BBQ Chicken', 'non-veg', '11.99'),
+    ('Meat Feast', 'non-veg', '12.99'), ('Hawaiian', 'non-veg', '10.49'), ('Spicy Sausage', 'non-veg', '11.29'),
+]
+
+
+def _zipf_weights(n, s=1.1):
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+class TableWriter:
+    """
+    Buffers rows for one model and writes them with ``executemany``. Goes
+    straight to the cursor: no model instances, no signals, and
+    ``auto_now_add`` fields keep the timestamps we generate.
+    """
+
+    def __init__(self, model, field_names):
+        self.model = model
+        self.fields = [model._meta.get_field(name) for name in field_names]
+        # Ints, strings and bools go to the driver as-is; only dates and
+        # decimals need the backend's adaptation.
+        self.converters = [
+            None if isinstance(f, (IntegerField, CharField, TextField, BooleanField, ForeignKey))
+            else f.get_db_prep_save
+            for f in self.fields
+        ]
+        self.rows = []
+        self.written = 0
+        self.seconds = 0.0
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in self.fields)
+        placeholders = ', '.join(['%s'] * len(self.fields))
+        self.sql = f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+    def add(self, *values):
+        self.rows.append(values)
+
+    def flush(self):
+        if not self.rows:
+            return
+        started = time.perf_counter()
+        converters = [(i, convert) for i, convert in enumerate(self.converters) if convert]
+        params = []
+        for row in self.rows:
+            row = list(row)
+            for i, convert in converters:
+                row[i] = convert(row[i], connection)
+            params.append(row)
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql, params)
+        self.seconds += time.perf_counter() - started
+        self.written += len(self.rows)
+        self.rows = []
+
+
+def _next_id(model):
+    return (model.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+
+
+class Seeder:
+    """
+    Deterministic synthetic data: the same ``seed`` and sizes always produce
+    the same rows. Popularity is Zipf-skewed for pizzas, customers and
+    partners; order times follow ``HOURLY_WEIGHTS`` over the last ``days``
+    days before ``end``.
+    """
+
+    def __init__(self, seed=42, users=200_000, orders=1_000_000, days=180, partner_ratio=0.02,
+                 chunk_size=10_000, end=DEFAULT_END, log=None):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.orders = orders
+        self.days = days
+        self.partner_ratio = partner_ratio
+        self.chunk_size = chunk_size
+        self.end = end
+        self.log = log or (lambda message: None)
+        self.writers = []
+
+    def writer(self, model, field_names):
+        writer = TableWriter(model, field_names)
+        self.writers.append(writer)
+        return writer
+
+    def flush(self, *writers):
+        # One transaction per chunk, parents before children, so FK checks
+        # pass on every backend and a crash loses at most one chunk.
+        with transaction.atomic():
+            for writer in writers:
+                writer.flush()
+
+    def run(self):
+        started = time.perf_counter()
+        pizzas = self.seed_pizzas()
+        customers, partners = self.seed_users()
+        self.seed_orders(pizzas, customers, partners)
+        self.reset_sequences()
+        elapsed = time.perf_counter() - started
+        total = sum(w.written for w in self.writers)
+        return {
+            'tables': {w.model._meta.db_table: (w.written, w.written / w.seconds if w.seconds else 0.0)
+                       for w in self.writers},
+            'rows': total,
+            'seconds': elapsed,
+            'rows_per_second': total / elapsed if elapsed else 0.0,
+        }
+
+    def seed_pizzas(self):
+        pizzas = list(Pizza.objects.order_by('id').values_list('id', 'price'))
+        if not pizzas:
+            Pizza.objects.bulk_create(
+                Pizza(name=name, description=f'{name} pizza', price=price, type=kind)
+                for name, kind, price in MENU
+            )
+            pizzas = list(Pizza.objects.order_by('id').values_list('id', 'price'))
+        self.rng.shuffle(pizzas)  # which pizza is the bestseller depends on the seed
+        return pizzas
+
+    def seed_users(self):
+        writer = self.writer(CustomUser, [
+            'id', 'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email',
+            'is_staff', 'is_active', 'date_joined', 'role', 'token_version',
+        ])
+        password = make_password(SEED_PASSWORD, salt='pizzaseed')
+        first_id = _next_id(CustomUser)
+        joined_from = self.end - timedelta(days=self.days * 2)
+        customers, partners = [], []
+        for offset in range(self.users):
+            user_id = first_id + offset
+            role = 'delivery_partner' if self.rng.random() < self.partner_ratio else 'customer'
+            (partners if role == 'delivery_partner' else customers).append(user_id)
+            username = f'seed{user_id}'
+            joined = joined_from + timedelta(seconds=self.rng.randrange(self.days * 86400))
+            writer.add(user_id, password, False, username, '', '', f'{username}@example.com',
+                       False, True, joined, role, 0)
+            if len(writer.rows) >= self.chunk_size:
+                self.flush(writer)
+        self.flush(writer)
+        self.log(f'users: {len(customers)} customers, {len(partners)} partners')
+        return customers, partners
+
+    def seed_orders(self, pizzas, customers, partners):
+        rng = self.rng
+        orders = self.writer(Order, [
+            'id', 'user', 'delivery_partner', 'status', 'total_price', 'payment_mode',
+            'payment_status', 'created_at', 'version',
+        ])
+        items = self.writer(OrderItem, ['id', 'order', 'pizza', 'quantity', 'price'])
+        ratings = self.writer(Rating, ['id', 'user', 'pizza', 'rating', 'comment', 'created_at'])
+        comments = self.writer(DeliveryComment, ['id', 'order', 'partner', 'comment', 'timestamp'])
+        ids = {w: _next_id(w.model) for w in (orders, items, ratings, comments)}
+
+        pizza_weights = _zipf_weights(len(pizzas))
+        customer_weights = _zipf_weights(len(customers), s=0.8)
+        partner_weights = _zipf_weights(len(partners), s=0.5) if partners else None
+        hours = list(range(24))
+        start = self.end - timedelta(days=self.days)
+        # Orders placed in the final two hours are still in flight.
+        in_flight_from = self.end - timedelta(hours=2)
+        quantities, rating_values = [1, 2, 3], [1, 2, 3, 4, 5]
+
+        for done in range(0, self.orders, self.chunk_size):
+            n = min(self.chunk_size, self.orders - done)
+            users = rng.choices(customers, cum_weights=customer_weights, k=n)
+            days = [rng.randrange(self.days) for _ in range(n)]
+            order_hours = rng.choices(hours, weights=HOURLY_WEIGHTS, k=n)
+            for user_id, day, hour in zip(users, days, order_hours):
+                created = start + timedelta(days=day, hours=hour, seconds=rng.randrange(3600))
+                if created >= in_flight_from:
+                    status = rng.choice(['pending', 'preparing', 'out_for_delivery'])
+                else:
+                    status = 'cancelled' if rng.random() < 0.05 else 'delivered'
+                partner = None
+                if partners and status not in ('pending', 'cancelled'):
+                    partner = rng.choices(partners, cum_weights=partner_weights)[0]
+                order_id = ids[orders]
+                ids[orders] += 1
+
+                total = Decimal('0')
+                lines = rng.choices(pizzas, cum_weights=pizza_weights, k=rng.choice([1, 1, 2, 2, 3, 4]))
+                for pizza_id, price in dict(lines).items():
+                    quantity = rng.choices(quantities, weights=[70, 22, 8])[0]
+                    total += price * quantity
+                    items.add(ids[items], order_id, pizza_id, quantity, price)
+                    ids[items] += 1
+                    if status == 'delivered' and rng.random() < 0.3:
+                        ratings.add(ids[ratings], user_id, pizza_id,
+                                    rng.choices(rating_values, weights=[3, 4, 10, 35, 48])[0], '',
+                                    created + timedelta(hours=rng.uniform(1, 48)))
+                        ids[ratings] += 1
+
+                payment_mode = 'online' if rng.random() < 0.6 else 'cod'
+                paid = 'paid' if status == 'delivered' or payment_mode == 'online' else 'pending'
+                orders.add(order_id, user_id, partner, status, total, payment_mode, paid, created,
+                           STATUS_VERSIONS[status])
+                if partner and status == 'delivered' and rng.random() < 0.4:
+                    comments.add(ids[comments], order_id, partner, 'Delivered',
+                                 created + timedelta(minutes=rng.randint(20, 60)))
+                    ids[comments] += 1
+            self.flush(orders, items, ratings, comments)
+            self.log(f'orders: {done + n}/{self.orders}')
+
+    def reset_sequences(self):
+        # Explicit ids leave PostgreSQL sequences behind; SQLite needs nothing.
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [w.model for w in self.writers])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -1,14 +1,43 @@
 from rest_framework import serializers
+from . import passwords
+from .middleware import TimedSerializerMixin
 from .models import CustomUser
 from django.contrib.auth.password_validation import validate_password
 
 from rest_framework import serializers
 from .models import Pizza
 
-class PizzaSerializer(serializers.ModelSerializer):
+class PizzaFilterSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=Pizza.PIZZA_TYPE_CHOICES, required=False)
+    # Unset means available pizzas only
+    is_available = serializers.BooleanField(required=False, allow_null=True)
+    min_price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    search = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        if attrs.get('min_price') is not None and attrs.get('max_price') is not None \
+                and attrs['min_price'] > attrs['max_price']:
+            raise serializers.ValidationError('min_price must not exceed max_price')
+        return attrs
+
+# PizzaSerializer, OrderSerializer and RatingSerializer back FlatListMixin
+# list views: a SerializerMethodField there gets a values_list() row with the
+# model's columns, not an instance, so it must not follow relations or call
+# model properties.
+class PizzaSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    avg_rating = serializers.SerializerMethodField()
+
     class Meta:
         model = Pizza
         fields = '__all__'
+        read_only_fields = ['rating_count', 'rating_sum']
+
+    def get_avg_rating(self, obj):
+        # obj is a Pizza or, on the menu list, a values_list() row.
+        if not obj.rating_count:
+            return None
+        return round(obj.rating_sum / obj.rating_count, 2)
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -19,10 +48,42 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('username', 'password', 'email', 'role')
 
     def create(self, validated_data):
-        user = CustomUser.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
+        user = CustomUser(
+            username=CustomUser.normalize_username(validated_data['username']),
+            email=CustomUser.objects.normalize_email(validated_data['email']),
             role=validated_data['role'],
-            password=validated_data['password']
+            # Hashed on the bounded pool, not the request thread
+            password=passwords.make_password(validated_data['password']),
         )
+        user.save()
         return user
+
+
+from .models import Order, OrderItem, Rating
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'pizza', 'quantity', 'price']
+
+
+# Listed through FlatListMixin; see the note above PizzaSerializer.
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'total_price', 'payment_mode', 'payment_status',
+                  'delivery_partner', 'created_at', 'items']
+
+
+# Listed through FlatListMixin; see the note above PizzaSerializer.
+class RatingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Rating
+        fields = ['id', 'pizza', 'rating', 'comment']
+
+    def validate_rating(self, value):
+        if not 1 <= value <= 5:
+            raise serializers.ValidationError('Rating must be between 1 and 5.')
+        return value
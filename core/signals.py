@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import menu_cache, rollups
+from .authentication import revoke_tokens
+from .models import CustomUser, Order, Pizza, Rating
+
+
+def _adjust(pizza_id, count, total):
+    Pizza.objects.filter(pk=pizza_id).update(
+        rating_count=F('rating_count') + count,
+        rating_sum=F('rating_sum') + total,
+    )
+
+
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_pizza_id, old_rating = getattr(instance, '_loaded', (None, None))
+    if created or old_pizza_id is None:
+        _adjust(instance.pizza_id, 1, instance.rating)
+    elif old_pizza_id != instance.pizza_id:
+        _adjust(old_pizza_id, -1, -old_rating)
+        _adjust(instance.pizza_id, 1, instance.rating)
+    elif old_rating != instance.rating:
+        _adjust(instance.pizza_id, 0, instance.rating - old_rating)
+    else:
+        return
+    instance._loaded = (instance.pizza_id, instance.rating)
+    transaction.on_commit(menu_cache.bump_version)
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    old_pizza_id, old_rating = getattr(instance, '_loaded', (instance.pizza_id, instance.rating))
+    _adjust(old_pizza_id, -1, -old_rating)
+    transaction.on_commit(menu_cache.bump_version)
+
+
+@receiver(post_save, sender=Pizza)
+@receiver(post_delete, sender=Pizza)
+def pizza_changed(sender, instance, raw=False, **kwargs):
+    # Every model write to the menu (API viewset, Django admin, shell) drops
+    # the cached menu pages; queryset updates bump the version themselves.
+    if not raw:
+        transaction.on_commit(menu_cache.bump_version)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    # Status changes through the API use queryset updates and call
+    # rollups.record_transition themselves (the admin uses them too); this
+    # covers model saves from the shell or scripts.
+    if raw:
+        return
+    old_status = None if created else getattr(instance, '_loaded_status', None)
+    if old_status != instance.status:
+        rollups.record_transition(instance.pk, old_status, instance.status)
+        instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    # Tokens carry the role and outlive the session that issued them, so a
+    # role, is_active or password change (API, admin, shell) revokes them.
+    # Rehashing the same password on login bypasses this (passwords.check_password).
+    loaded = getattr(instance, '_loaded_auth', None)
+    if not (raw or created or loaded is None) and loaded != instance.auth_state():
+        revoke_tokens(instance.pk)
+        instance.refresh_from_db(fields=['token_version'])
+    instance._loaded_auth = instance.auth_state()
@@ -1,3 +1,1170 @@
-from django.test import TestCase
+import json
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import addModuleCleanup, mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from asgiref.sync import sync_to_async
+
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.client import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .admin import OrderAdmin
+from .authentication import get_token_version, revoke_tokens
+from . import events, fast_json, loadtest, menu_cache, passwords, rollups, throttling
+from .cart import CartSerializer, CartView
+from .dispatch import LeastLoadedPolicy, RoundRobinPolicy, dispatch_batch
+from .export import export_orders
+from .flat_serializers import FlatSerializer
+from .middleware import QueryBudgetExceeded
+from .order_status import TransitionConflict, transition
+from .serializers import OrderSerializer, PizzaSerializer
+from .models import (CartItem, CustomUser, DailyOrders, DailySales, DeliveryComment, HourlySales, Order, OrderItem,
+                     Pizza, Rating)
+
+
+
+def setUpModule():
+    # The token buckets live in process memory for the whole run, so with the
+    # real rates the tests would share one login bucket per client IP. Only
+    # ThrottleTests turn throttling on, by patching a throttle's rate.
+    rates = dict.fromkeys(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'])
+    patcher = mock.patch.object(throttling.TokenBucketThrottle, 'THROTTLE_RATES', rates)
+    patcher.start()
+    addModuleCleanup(patcher.stop)
+
+
+class MenuCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Pizza.objects.create(name='Margherita', description='Classic', price='8.50', type='veg')
+        self.admin = CustomUser.objects.create_user(username='admin1', password='x', role='admin')
+
+    def test_warm_menu_read_issues_no_queries(self):
+        self.client.get('/api/pizzas/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/pizzas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get('/api/pizzas/')['ETag']
+        response = self.client.get('/api/pizzas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Vary'], 'Accept')
+
+    def test_validated_by_version_not_by_time(self):
+        first = self.client.get('/api/pizzas/')
+        self.assertEqual(first['Vary'], 'Accept')
+        self.assertNotIn('Last-Modified', first)
+        menu_cache.bump_version()
+        response = self.client.get('/api/pizzas/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_write_bumps_version(self):
+        etag = self.client.get('/api/pizzas/')['ETag']
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/pizzas/', {
+                'name': 'Farmhouse', 'description': 'Veg', 'price': '9.00', 'type': 'veg', 'is_available': True,
+            })
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/pizzas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_django_admin_edit_bumps_version(self):
+        etag = self.client.get('/api/pizzas/')['ETag']
+        pizza = Pizza.objects.get()
+        self.client.force_login(CustomUser.objects.create_superuser(username='root', password='x', role='admin'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/admin/core/pizza/{pizza.pk}/change/', {
+                'name': pizza.name, 'description': pizza.description, 'price': '9.25', 'type': 'veg',
+                'is_available': 'on',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+        response = self.client.get('/api/pizzas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['price'], '9.25')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for i in range(5):
+            Pizza.objects.create(name=f'Pizza {i}', description='', price='5.00', type='veg')
+
+    def test_menu_pages_follow_opaque_cursor(self):
+        first = self.client.get('/api/pizzas/', {'page_size': 2}).data
+        self.assertEqual([p['name'] for p in first['results']], ['Pizza 0', 'Pizza 1'])
+        second = self.client.get(first['next']).data
+        self.assertEqual([p['name'] for p in second['results']], ['Pizza 2', 'Pizza 3'])
+
+    def test_page_size_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=3):
+            response = self.client.get('/api/pizzas/', {'page_size': 50})
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class StatelessAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        CustomUser.objects.create_user(username='admin1', password='pass12345', role='admin')
+
+    def login(self):
+        response = self.client.post('/api/login/', {'username': 'admin1', 'password': 'pass12345'})
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.data['access'])
+
+    def test_role_check_needs_no_user_query(self):
+        self.login()
+        self.client.get('/api/orders/')
+        # Only the order list itself hits the database.
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/pizzas/', {'name': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_revoked_token_is_rejected(self):
+        self.login()
+        revoke_tokens(CustomUser.objects.get().pk)
+        self.assertEqual(self.client.get('/api/orders/').status_code, 401)
+
+    def test_role_and_active_changes_revoke_tokens(self):
+        for change in ({'role': 'customer'}, {'is_active': False}):
+            user = CustomUser.objects.get()
+            user.role, user.is_active = 'admin', True
+            user.save()
+            self.login()
+            for field, value in change.items():
+                setattr(user, field, value)
+            user.save()
+            self.assertEqual(self.client.get('/api/orders/').status_code, 401)
+
+    def test_version_is_cached_with_a_finite_timeout(self):
+        with override_settings(TOKEN_VERSION_CACHE_TIMEOUT=7), mock.patch.object(cache, 'set') as cache_set:
+            get_token_version(CustomUser.objects.get().pk)
+        self.assertEqual(cache_set.call_args.kwargs['timeout'], 7)
+
+    def test_refresh_takes_the_current_role(self):
+        refresh = self.client.post('/api/login/', {'username': 'admin1', 'password': 'pass12345'}).data['refresh']
+        CustomUser.objects.update(role='delivery_partner')
+        access = self.client.post('/api/token/refresh/', {'refresh': refresh}).data['access']
+        self.assertEqual(AccessToken(access)['role'], 'delivery_partner')
+        user = CustomUser.objects.get()
+        user.role = 'customer'
+        user.save()
+        self.assertEqual(self.client.post('/api/token/refresh/', {'refresh': refresh}).status_code, 401)
+
+
+class CartMutationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='cust1', password='x', role='customer')
+        self.client.force_authenticate(self.user)
+        self.pizzas = [
+            Pizza.objects.create(name=f'Pizza {i}', description='', price='5.00', type='veg')
+            for i in range(10)
+        ]
+
+    def test_repeated_adds_increment_one_line(self):
+        for _ in range(3):
+            self.client.post('/api/cart/', {'pizza_id': self.pizzas[0].id, 'quantity': 2})
+        self.assertEqual(CartItem.objects.get().quantity, 6)
+
+    def test_bulk_add_query_count_is_constant(self):
+        def add(pizzas):
+            items = [{'pizza_id': p.id, 'quantity': 1} for p in pizzas]
+            return self.client.post('/api/cart/items/', {'items': items}, format='json')
+
+        add(self.pizzas[:1])
+        with self.assertNumQueries(6):
+            add(self.pizzas[:1])
+        with self.assertNumQueries(6):
+            response = add(self.pizzas)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(CartItem.objects.values_list('quantity', flat=True)), [1] * 9 + [3])
+
+    def test_unknown_pizza_is_404(self):
+        response = self.client.post('/api/cart/', {'pizza_id': 999})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cart_read_is_two_queries_with_totals(self):
+        items = [{'pizza_id': p.id, 'quantity': 2} for p in self.pizzas]
+        self.client.post('/api/cart/items/', {'items': items}, format='json')
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/cart/')
+        self.assertEqual(len(response.data['items']), 10)
+        self.assertEqual(response.data['items'][0]['subtotal'], '10.00')
+        self.assertEqual(response.data['total'], '100.00')
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='cust1', password='x', role='customer')
+        self.client.force_authenticate(self.user)
+        self.pizzas = [
+            Pizza.objects.create(name=f'Pizza {i}', description='', price='4.00', type='veg')
+            for i in range(20)
+        ]
+
+    def fill_cart(self, pizzas):
+        items = [{'pizza_id': p.id, 'quantity': 2} for p in pizzas]
+        self.client.post('/api/cart/items/', {'items': items}, format='json')
+
+    def test_checkout_snapshots_cart_into_order(self):
+        self.fill_cart(self.pizzas[:3])
+        response = self.client.post('/api/checkout/', {'payment_mode': 'cod'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_price'], '24.00')
+        self.assertEqual(OrderItem.objects.filter(price='4.00').count(), 3)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        self.fill_cart(self.pizzas[:1])
+        with self.assertNumQueries(9):
+            self.client.post('/api/checkout/', {'payment_mode': 'cod'})
+        self.fill_cart(self.pizzas)
+        with self.assertNumQueries(9):
+            self.client.post('/api/checkout/', {'payment_mode': 'cod'})
+
+    def test_idempotency_key_replays_original_order(self):
+        self.fill_cart(self.pizzas[:2])
+        first = self.client.post('/api/checkout/', {'payment_mode': 'online'}, HTTP_IDEMPOTENCY_KEY='abc')
+        self.fill_cart(self.pizzas[:2])
+        retry = self.client.post('/api/checkout/', {'payment_mode': 'online'}, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_empty_cart_is_rejected(self):
+        response = self.client.post('/api/checkout/', {'payment_mode': 'cod'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unavailable_pizzas_are_refused(self):
+        self.fill_cart(self.pizzas[:2])
+        Pizza.objects.filter(pk=self.pizzas[1].pk).update(is_available=False)
+        response = self.client.post('/api/checkout/', {'payment_mode': 'cod'})
+        self.assertEqual((response.status_code, response.data['pizza_ids']), (409, [self.pizzas[1].pk]))
+        self.assertFalse(Order.objects.exists())
+        response = self.client.post('/api/cart/', {'pizza_id': self.pizzas[1].pk})
+        self.assertEqual(response.status_code, 404)
+
+    def test_total_matches_item_snapshot(self):
+        self.fill_cart(self.pizzas[:3])
+        self.client.post('/api/checkout/', {'payment_mode': 'cod'})
+        order = Order.objects.get()
+        self.assertEqual(order.total_price, sum(i.quantity * i.price for i in order.items.all()))
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='cust1', password='x', role='customer')
+        self.pizza = Pizza.objects.create(name='Margherita', description='', price='8.00', type='veg')
+        self.other = Pizza.objects.create(name='Pepperoni', description='', price='9.00', type='non-veg')
+
+    def test_aggregates_follow_create_edit_delete(self):
+        first = Rating.objects.create(user=self.user, pizza=self.pizza, rating=5)
+        Rating.objects.create(user=self.user, pizza=self.pizza, rating=2)
+        first = Rating.objects.get(pk=first.pk)
+        first.rating = 4
+        first.save()
+        self.pizza.refresh_from_db()
+        self.assertEqual((self.pizza.rating_count, self.pizza.rating_sum), (2, 6))
+
+        first.pizza = self.other
+        first.save()
+        Rating.objects.filter(rating=2).delete()
+        self.pizza.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.pizza.rating_count, self.pizza.rating_sum), (0, 0))
+        self.assertEqual((self.other.rating_count, self.other.rating_sum), (1, 4))
+
+    def test_menu_exposes_avg_rating_in_one_query(self):
+        Rating.objects.create(user=self.user, pizza=self.pizza, rating=5)
+        Rating.objects.create(user=self.user, pizza=self.pizza, rating=4)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/pizzas/')
+        self.assertEqual(response.data['results'][0]['avg_rating'], 4.5)
+        self.assertIsNone(response.data['results'][1]['avg_rating'])
+
+    def test_repair_command_recomputes(self):
+        Rating.objects.create(user=self.user, pizza=self.pizza, rating=3)
+        Pizza.objects.update(rating_count=0, rating_sum=0)
+        call_command('repair_rating_aggregates', stdout=StringIO())
+        self.pizza.refresh_from_db()
+        self.assertEqual((self.pizza.rating_count, self.pizza.rating_sum), (1, 3))
+
+
+class DispatcherTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        customer = CustomUser.objects.create_user(username='cust1', password='x', role='customer')
+        self.partners = [
+            CustomUser.objects.create_user(username=f'partner{i}', password='x', role='delivery_partner')
+            for i in range(3)
+        ]
+        self.orders = [
+            Order.objects.create(user=customer, status='preparing', total_price='10.00', payment_mode='cod')
+            for _ in range(5)
+        ]
+        self.busy = Order.objects.create(user=customer, status='out_for_delivery', total_price='10.00',
+                                         payment_mode='cod', delivery_partner=self.partners[0])
+
+    def assignments(self):
+        return list(Order.objects.filter(status='preparing').order_by('id')
+                    .values_list('delivery_partner_id', flat=True))
+
+    def test_only_idle_partners_get_orders(self):
+        self.assertEqual(dispatch_batch(policy=LeastLoadedPolicy()), 2)
+        self.assertEqual(self.assignments(),
+                         [self.partners[1].pk, self.partners[2].pk, None, None, None])
+
+    def test_capacity_and_round_robin_spread(self):
+        assigned = dispatch_batch(policy=RoundRobinPolicy(), capacity=2)
+        self.assertEqual(assigned, 5)
+        loads = Order.objects.filter(status__in=['preparing', 'out_for_delivery']).values_list(
+            'delivery_partner_id', flat=True)
+        self.assertEqual(sorted(list(loads).count(p.pk) for p in self.partners), [2, 2, 2])
+
+
+class OrderEventStreamTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = CustomUser.objects.create_user(username='cust1', password='pass12345', role='customer')
+        self.partner = CustomUser.objects.create_user(username='partner1', password='x', role='delivery_partner')
+        self.order = Order.objects.create(user=self.customer, delivery_partner=self.partner, status='preparing',
+                                          total_price='10.00', payment_mode='cod')
+        token = self.client.post('/api/login/', {'username': 'cust1', 'password': 'pass12345'}).data['access']
+        self.request = AsyncRequestFactory().get(f'/api/orders/{self.order.pk}/events/', {'token': token})
+
+    def test_status_update_is_pushed_to_order_stream(self):
+        async def scenario():
+            response = await events.order_events(self.request, self.order.pk)
+            stream = aiter(response.streaming_content)
+            first = await anext(stream)
+            events.publish_order_status(self.order.pk, 'out_for_delivery', self.partner.pk)
+            second = await asyncio.wait_for(anext(stream), 1)
+            await stream.aclose()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertIn(b'"status": "preparing"', first)
+        self.assertIn(b'"status": "out_for_delivery"', second)
+        self.assertFalse(events.get_broker()._subscribers)
+
+    def collect(self, published_during_snapshot=()):
+        # Statuses the order stream sends until it ends, with changes published
+        # while the opening snapshot is being read.
+        read_snapshot = events._order_snapshot
+
+        def snapshot(order_id):
+            first = read_snapshot(order_id)
+            for status, version in published_during_snapshot:
+                events.publish_order_status(order_id, status, self.partner.pk, version)
+            return first
+
+        async def scenario():
+            response = await events.order_events(self.request, self.order.pk)
+            return [chunk async for chunk in response.streaming_content]
+
+        with mock.patch.object(events, '_order_snapshot', snapshot):
+            chunks = asyncio.run(asyncio.wait_for(scenario(), 5))
+        return [json.loads(chunk.split(b'data: ', 1)[1])['status'] for chunk in chunks]
+
+    def test_changes_racing_the_snapshot_are_kept_and_final_status_ends_stream(self):
+        statuses = self.collect([('preparing', 0), ('out_for_delivery', 1), ('delivered', 2)])
+        self.assertEqual(statuses, ['preparing', 'out_for_delivery', 'delivered'])
+        self.assertFalse(events.get_broker()._subscribers)
+
+    def test_stream_of_finished_order_closes_after_snapshot(self):
+        Order.objects.filter(pk=self.order.pk).update(status='cancelled', version=1)
+        self.assertEqual(self.collect(), ['cancelled'])
+
+    def test_update_status_view_publishes(self):
+        self.client.force_authenticate(self.partner)
+        with mock.patch.object(events.get_broker(), 'publish') as publish:
+            response = self.client.patch(f'/api/orders/{self.order.pk}/update-status/',
+                                         {'status': 'out_for_delivery'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(call.args[0] for call in publish.call_args_list),
+                         [f'order:{self.order.pk}', f'partner:{self.partner.pk}'])
+
+    def test_redis_listener_is_restarted_once_it_stops(self):
+        # Skips __init__, which needs the redis package; the listener is faked.
+        broker = events.RedisBroker.__new__(events.RedisBroker)
+        events.InProcessBroker.__init__(broker)
+        broker._listeners = {}
+        started = []
+
+        async def listen():
+            started.append(len(started))
+
+        async def scenario():
+            with mock.patch.object(broker, '_listen', listen):
+                for _ in range(2):
+                    (await broker.subscribe('order:1')).close()
+                    await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+        self.assertEqual(started, [0, 1])
+
+
+class LoadTestHelperTests(TestCase):
+    def read_response(self, raw):
+        async def read():
+            conn = loadtest.Connection('localhost', 80)
+            conn.reader = asyncio.StreamReader()
+            conn.reader.feed_data(raw)
+            conn.reader.feed_eof()
+            return await conn._read_response()
+        return asyncio.run(read())
+
+    def test_parse_mix(self):
+        self.assertEqual(loadtest.parse_mix('customer=8, admin, delivery_partner=2'),
+                         {'customer': 8, 'admin': 1, 'delivery_partner': 2})
+        with self.assertRaises(argparse.ArgumentTypeError):
+            loadtest.parse_mix('customer=1,chef=2')
+
+    def test_percentile_is_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual([loadtest._percentile(samples, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(loadtest._percentile([7], 99), 7)
+
+    def test_recorder_report(self):
+        recorder = loadtest.Recorder()
+        for ms in (10, 20, 30, 40):
+            recorder.add('GET /pizzas/', ms / 1000, 200)
+        recorder.add('GET /pizzas/', 0.5, 503)
+        recorder.errors['GET /pizzas/'] += 1
+        recorder.errors['POST /checkout/'] += 2
+        report = recorder.report(elapsed=2.0)
+        menu = report['GET /pizzas/']
+        self.assertEqual((menu['requests'], menu['errors'], menu['throughput_rps']), (5, 1, 2.5))
+        self.assertEqual(menu['statuses'], {'200': 4, '503': 1})
+        self.assertEqual((menu['p50_ms'], menu['p99_ms'], menu['mean_ms']), (30.0, 500.0, 120.0))
+        self.assertEqual(report['POST /checkout/'], {'requests': 0, 'errors': 2, 'throughput_rps': 0.0, 'statuses': {}})
+
+    def test_response_parsing(self):
+        status, headers, body = self.read_response(
+            b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}')
+        self.assertEqual((status, headers['content-type'], body), (200, 'application/json', b'{}'))
+        chunked = b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3;x=y\r\nabc\r\n2\r\nde\r\n0\r\n\r\n'
+        self.assertEqual(self.read_response(chunked)[2], b'abcde')
+        self.assertEqual(self.read_response(b'HTTP/1.1 304 Not Modified\r\nETag: "x"\r\n\r\n')[2], b'')
+        self.assertEqual(self.read_response(b'HTTP/1.0 200 OK\r\n\r\nuntil close')[2], b'until close')
+
+    def test_command_creates_the_admin_account(self):
+        with mock.patch.object(loadtest, 'run_from_options') as run:
+            call_command('loadtest', '--mix', 'customer=1,admin=1', stdout=StringIO())
+        options = run.call_args.args[0]
+        user = CustomUser.objects.get(username=options['admin_username'])
+        self.assertEqual(user.role, 'admin')
+        self.assertTrue(user.check_password(options['admin_password']))
+        with self.assertRaises(ValueError):
+            loadtest.LoadRun('http://localhost/api', 1, 1, {'admin': 1})
+
+
+class SeedDataTests(TestCase):
+    def test_small_seed_is_consistent(self):
+        call_command('seed_data', users=100, orders=300, chunk_size=120, stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 300)
+        self.assertFalse(OrderItem.objects.filter(order__isnull=True).exists())
+        pizza = Pizza.objects.order_by('-rating_count').first()
+        self.assertEqual(pizza.rating_count, pizza.ratings.count())
+        delivered = OrderItem.objects.filter(order__status='delivered')
+        self.assertEqual(DailySales.objects.aggregate(n=Sum('units'))['n'], delivered.aggregate(n=Sum('quantity'))['n'])
+
+    def seed_digest(self, seed):
+        call_command('seed_data', seed=seed, users=60, orders=200, chunk_size=70, stdout=StringIO())
+        rows = [
+            list(model.objects.order_by('id').values_list(*fields))
+            for model, fields in (
+                (CustomUser, ('id', 'username', 'role', 'date_joined')),
+                (Order, ('id', 'user_id', 'delivery_partner_id', 'status', 'total_price', 'payment_mode',
+                         'payment_status', 'created_at', 'version')),
+                (OrderItem, ('id', 'order_id', 'pizza_id', 'quantity', 'price')),
+                (Rating, ('id', 'user_id', 'pizza_id', 'rating', 'created_at')),
+                (DeliveryComment, ('id', 'order_id', 'partner_id', 'timestamp')),
+            )
+        ]
+        CustomUser.objects.all().delete()
+        return hashlib.sha256(repr(rows).encode()).hexdigest()
+
+    def test_same_seed_gives_same_rows(self):
+        first = self.seed_digest(7)
+        self.assertEqual(self.seed_digest(7), first)
+        self.assertNotEqual(self.seed_digest(8), first)
+
+
+class SQLiteProfileTests(TestCase):
+    def test_tuned_pragmas_apply_to_new_connections(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            probe = type(connections['default'])({
+                **connection.settings_dict, 'NAME': os.path.join(tmp, 'probe.sqlite3'),
+                'OPTIONS': settings.SQLITE_TUNED_OPTIONS,
+            }, alias='sqlite-profile-probe')
+            try:
+                with probe.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'busy_timeout', 'synchronous', 'temp_store'):
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                probe.close()
+        # synchronous=NORMAL is 1, temp_store=MEMORY is 2
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'busy_timeout': 10000, 'synchronous': 1, 'temp_store': 2})
+        self.assertEqual(probe.transaction_mode, 'IMMEDIATE')
+
+@override_settings(REQUEST_INSTRUMENTATION=True, QUERY_BUDGET_RAISE=True)
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(username='c', password='x', role='customer'))
+        pizzas = [Pizza.objects.create(name=f'P{i}', description='', price='5.00', type='veg') for i in range(3)]
+        items = [{'pizza_id': p.id, 'quantity': 1} for p in pizzas]
+        self.client.post('/api/cart/items/', {'items': items}, format='json')
+
+    def test_server_timing_reports_queries(self):
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            response = self.client.get('/api/cart/')
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+        self.assertIn('"view": "CartView"', logs.output[0])
+
+    def test_query_budget_is_enforced(self):
+        with mock.patch.object(CartView, 'query_budget', 1), self.assertLogs('core.requests', 'WARNING'):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/cart/')
+
+    async def test_async_requests_do_not_report_unmeasured_queries(self):
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            response = await self.async_client.get('/api/async/pizzas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('db;', response['Server-Timing'])
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+        self.assertIn('"queries": null', logs.output[0])
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(username='boss', password='x', role='admin'))
+        customer = CustomUser.objects.create_user(username='c', password='x', role='customer')
+        pizza = Pizza.objects.create(name='Margherita', description='', price='5.00', type='veg')
+        self.orders = []
+        for status in ('delivered', 'cancelled', 'delivered'):
+            order = Order.objects.create(user=customer, total_price='10.00', payment_mode='cod', status=status)
+            self.orders.append(order)
+        OrderItem.objects.create(order=self.orders[0], pizza=pizza, quantity=2, price='5.00')
+        OrderItem.objects.create(order=self.orders[2], pizza=pizza, quantity=1, price='5.00')
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_nests_items_under_orders(self):
+        response = self.client.get('/api/orders/export/', {'status': 'delivered'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([r['id'] for r in records], [self.orders[0].id, self.orders[2].id])
+        self.assertEqual(records[0]['items'][0]['quantity'], 2)
+        self.assertEqual(records[1]['items'][0]['pizza'], 'Margherita')
+
+    def test_orders_committed_during_export_are_left_out(self):
+        records = export_orders(chunk_size=1)
+        first = next(records)
+        late = Order.objects.create(user=self.orders[0].user, total_price='5.00', payment_mode='cod')
+        OrderItem.objects.create(order=late, pizza=Pizza.objects.get(), quantity=1, price='5.00')
+        ids = [json.loads(line)['id'] for chunk in [first, *records] for line in chunk.splitlines()]
+        self.assertEqual(ids, [order.id for order in self.orders])
+
+    def test_csv_has_one_row_per_item(self):
+        response = self.client.get('/api/orders/export/', {'format': 'csv'})
+        rows = self.read(response).splitlines()
+        self.assertEqual(rows[0].split(',')[0], 'order_id')
+        # Two items plus the cancelled order without items.
+        self.assertEqual(len(rows), 4)
+
+    def test_date_range_and_permissions(self):
+        Order.objects.filter(pk=self.orders[0].pk).update(created_at='2020-01-01T12:00:00Z')
+        response = self.client.get('/api/orders/export/', {'since': '2019-12-31', 'until': '2020-01-01'})
+        self.assertEqual(len(self.read(response).splitlines()), 1)
+        self.assertEqual(self.client.get('/api/orders/export/', {'until': 'soon'}).status_code, 400)
+        self.client.force_authenticate(CustomUser.objects.get(username='c'))
+        self.assertEqual(self.client.get('/api/orders/export/').status_code, 403)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='root', password='x', role='admin')
+        self.client.force_login(self.admin)
+        self.pizza = Pizza.objects.create(name='Margherita', description='', price='5.00', type='veg')
+
+    def add_orders(self, n):
+        for _ in range(n):
+            order = Order.objects.create(user=self.admin, total_price='5.00', payment_mode='cod')
+            OrderItem.objects.create(order=order, pizza=self.pizza, quantity=1, price='5.00')
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for url in ('/admin/core/order/', '/admin/core/orderitem/'):
+            self.add_orders(2)
+            with CaptureQueriesContext(connection) as few:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.add_orders(20)
+            with CaptureQueriesContext(connection) as many:
+                self.client.get(url)
+            self.assertEqual(len(few), len(many))
+
+    def test_large_unfiltered_list_is_not_counted(self):
+        self.add_orders(3)
+        with mock.patch('core.admin.ESTIMATE_THRESHOLD', 2), CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/core/order/')
+        self.assertEqual(response.context['cl'].result_count, Order.objects.latest('id').id)
+        self.assertFalse([q for q in queries if 'COUNT(*)' in q['sql']])
+
+    def test_status_changes_only_through_transition_actions(self):
+        self.add_orders(2)
+        delivered, pending = Order.objects.order_by('id')
+        Order.objects.filter(pk=delivered.pk).update(status='delivered')
+        self.assertEqual(OrderAdmin(Order, admin.site).get_readonly_fields(None),
+                         ('status', 'version', 'idempotency_key'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/core/order/', {
+                'action': 'mark_preparing', '_selected_action': [delivered.pk, pending.pk],
+            }, follow=True)
+        self.assertContains(response, '1 order(s) marked preparing.')
+        self.assertContains(response, f'Cannot mark preparing: order(s) {delivered.pk}.')
+        self.assertEqual(list(Order.objects.order_by('id').values_list('status', 'version')),
+                         [('delivered', 0), ('preparing', 1)])
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(username='boss', password='x', role='admin'))
+        customer = CustomUser.objects.create_user(username='c', password='x', role='customer')
+        self.pizzas = [Pizza.objects.create(name=f'P{i}', description='', price='5.00', type='veg') for i in range(2)]
+        self.orders = []
+        for mode in ('cod', 'online', 'cod'):
+            order = Order.objects.create(user=customer, total_price='15.00', payment_mode=mode, status='preparing')
+            OrderItem.objects.create(order=order, pizza=self.pizzas[0], quantity=2, price='5.00')
+            OrderItem.objects.create(order=order, pizza=self.pizzas[1], quantity=1, price='5.00')
+            self.orders.append(order)
+
+    def set_status(self, order, status):
+        return self.client.patch(f'/api/orders/{order.pk}/update-status/', {'status': status}, format='json')
+
+    def deliver(self, order):
+        self.set_status(order, 'out_for_delivery')
+        return self.set_status(order, 'delivered')
+
+    def snapshot(self):
+        return (sorted(DailySales.objects.values_list('pizza_id', 'payment_mode', 'orders', 'units', 'revenue', 'cancelled')),
+                sorted(DailyOrders.objects.values_list('payment_mode', 'orders', 'cancelled')))
+
+    def test_transitions_update_rollups_incrementally(self):
+        for order in self.orders[:2]:
+            self.deliver(order)
+        self.set_status(self.orders[2], 'cancelled')
+        row = DailySales.objects.get(pizza=self.pizzas[0], payment_mode='cod')
+        self.assertEqual((row.orders, row.units, row.revenue, row.cancelled), (1, 2, Decimal('10.00'), 1))
+        self.assertEqual(HourlySales.objects.aggregate(n=Sum('units'))['n'], 6)
+
+        incremental = self.snapshot()
+        call_command('backfill_sales_rollups', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rebuild_counts_orders_not_lines(self):
+        OrderItem.objects.create(order=self.orders[0], pizza=self.pizzas[0], quantity=1, price='5.00')
+        self.deliver(self.orders[0])
+        incremental = self.snapshot()
+        call_command('backfill_sales_rollups', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(DailySales.objects.get(pizza=self.pizzas[0]).orders, 1)
+
+    def test_unrelated_transitions_do_not_touch_rollups(self):
+        # Savepoint, conditional UPDATE, release: nothing for the rollups.
+        with self.assertNumQueries(3):
+            self.set_status(self.orders[0], 'out_for_delivery')
+        self.assertFalse(DailySales.objects.exists())
+
+    def test_analytics_endpoint_reads_rollups(self):
+        for order in self.orders:
+            self.deliver(order)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/analytics/sales/', {'group_by': 'payment_mode'})
+        self.assertEqual(response.data['revenue'], '45.00')
+        self.assertEqual([(r['payment_mode'], r['units']) for r in response.data['results']], [('cod', 6), ('online', 3)])
+        hourly = self.client.get('/api/analytics/sales/', {'granularity': 'hour', 'group_by': ['period', 'pizza']})
+        self.assertEqual(len(hourly.data['results']), 2)
+
+    def test_multi_pizza_order_counts_once_per_period(self):
+        self.deliver(self.orders[0])
+        self.set_status(self.orders[1], 'cancelled')
+        today = timezone.localdate()
+        incremental = rollups.sales_report(today, today)
+        call_command('backfill_sales_rollups', stdout=StringIO())
+        self.assertEqual(rollups.sales_report(today, today), incremental)
+        row = incremental['results'][0]
+        self.assertEqual((row['orders'], row['units'], row['revenue'], row['cancelled']), (1, 3, '15.00', 1))
+        by_pizza = rollups.sales_report(today, today, group_by=['pizza'])
+        self.assertEqual([(r['orders'], r['cancelled']) for r in by_pizza['results']], [(1, 1), (1, 1)])
+
+class OrderStatusTransitionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(username='boss', password='x', role='admin'))
+        customer = CustomUser.objects.create_user(username='c', password='x', role='customer')
+        self.order = Order.objects.create(user=customer, total_price='10.00', payment_mode='cod')
+
+    def patch(self, data):
+        return self.client.patch(f'/api/orders/{self.order.pk}/update-status/', data, format='json')
+
+    def test_transitions_follow_the_table(self):
+        self.assertEqual(self.patch({'status': 'preparing'}).data, {'id': self.order.pk, 'status': 'preparing', 'version': 1})
+        self.assertEqual(self.patch({'status': 'delivered'}).status_code, 409)
+        self.assertEqual(self.patch({'status': 'out_for_delivery'}).status_code, 200)
+        self.assertEqual(self.patch({'status': 'delivered'}).status_code, 200)
+        response = self.patch({'status': 'preparing'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual((response.data['status'], response.data['version']), ('delivered', 3))
+        self.assertEqual(self.patch({'status': 'cancelled'}).status_code, 409)
+
+    def test_stale_version_is_rejected(self):
+        self.assertEqual(self.patch({'status': 'preparing', 'version': 0}).status_code, 200)
+        stale = self.patch({'status': 'cancelled', 'version': 0})
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.data['version'], 1)
+        self.assertEqual(self.patch({'status': 'cancelled', 'version': 1}).data['version'], 2)
+
+    def test_partner_only_moves_own_orders(self):
+        partner = CustomUser.objects.create_user(username='p', password='x', role='delivery_partner')
+        self.client.force_authenticate(partner)
+        self.assertEqual(self.patch({'status': 'preparing'}).status_code, 404)
+        Order.objects.filter(pk=self.order.pk).update(delivery_partner=partner)
+        self.assertEqual(self.patch({'status': 'preparing'}).status_code, 200)
+
+    def test_backends_without_update_returning_read_back(self):
+        with mock.patch.object(connection.features, 'can_return_columns_from_insert', False), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(transition(self.order.pk, 'preparing'), (None, 1))
+            with self.assertRaises(TransitionConflict):
+                transition(self.order.pk, 'delivered')
+        self.assertFalse([q for q in queries if 'RETURNING' in q['sql']])
+
+
+class OrderStatusConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        customer = CustomUser.objects.create_user(username='c', password='x', role='customer')
+        pizza = Pizza.objects.create(name='P', description='', price='5.00', type='veg')
+        self.order = Order.objects.create(user=customer, total_price='10.00', payment_mode='cod')
+        OrderItem.objects.create(order=self.order, pizza=pizza, quantity=2, price='5.00')
+
+    def hammer(self, targets, rounds):
+        """Every thread tries each target ``rounds`` times at once; returns the wins as (version, status)."""
+        barrier = threading.Barrier(len(targets))
+        wins, errors = [], []
+
+        def attempt(new_status):
+            # The in-memory test database reports contention as "table is
+            # locked" instead of waiting; treat it like a busy writer.
+            while True:
+                try:
+                    return transition(self.order.pk, new_status)
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    time.sleep(0.001)
+
+        def worker(new_status):
+            try:
+                for _ in range(rounds):
+                    barrier.wait()
+                    try:
+                        wins.append((attempt(new_status)[1], new_status))
+                    except TransitionConflict:
+                        pass
+            except Exception as e:
+                errors.append(e)
+                barrier.abort()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return sorted(wins)
+
+    def test_one_winner_per_transition(self):
+        wins = self.hammer(['preparing'] * 8, rounds=1)
+        self.assertEqual(wins, [(1, 'preparing')])
+        self.assertEqual(Order.objects.values_list('status', 'version').get(), ('preparing', 1))
+
+    def test_racing_kitchen_partner_and_cancellation(self):
+        targets = ['preparing', 'out_for_delivery', 'delivered', 'cancelled'] * 3
+        wins = self.hammer(targets, rounds=4)
+        self.assertEqual([version for version, _ in wins], list(range(1, len(wins) + 1)))
+        path = ['pending'] + [new for _, new in wins]
+        for old, new in zip(path, path[1:]):
+            self.assertIn(new, Order.TRANSITIONS[old])
+        final = path[-1]
+        self.assertEqual(Order.objects.values_list('status', 'version').get(), (final, len(wins)))
+        rollup = DailySales.objects.values_list('orders', 'units', 'cancelled').first() or (0, 0, 0)
+        self.assertEqual(rollup, {'delivered': (1, 2, 0), 'cancelled': (0, 0, 1)}.get(final, (0, 0, 0)))
+
+
+class DeliveryCommentBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        customer = CustomUser.objects.create_user(username='c', password='x', role='customer')
+        self.partner = CustomUser.objects.create_user(username='p', password='x', role='delivery_partner')
+        self.orders = [Order.objects.create(user=customer, delivery_partner=self.partner, total_price='10.00',
+                                            payment_mode='cod') for _ in range(2)]
+        self.foreign = Order.objects.create(user=customer, total_price='10.00', payment_mode='cod')
+        self.client.force_authenticate(self.partner)
+
+    def flush(self, comments):
+        return self.client.post('/api/delivery-comments/batch/', {'comments': comments}, format='json')
+
+    def test_batch_is_stored_in_a_fixed_number_of_queries(self):
+        comments = [{'client_id': f'c{i}', 'order_id': self.orders[i % 2].pk, 'comment': f'note {i}'}
+                    for i in range(50)]
+        # Savepoint, owned orders, stored client ids, one INSERT, read back, release.
+        with self.assertNumQueries(6):
+            response = self.flush(comments)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({r['status'] for r in response.data['results']}, {'created'})
+        self.assertEqual(DeliveryComment.objects.filter(partner=self.partner).count(), 50)
+
+    def test_per_item_results(self):
+        self.flush([{'client_id': 'a', 'order_id': self.orders[0].pk, 'comment': 'first'}])
+        response = self.flush([
+            {'client_id': 'a', 'order_id': self.orders[0].pk, 'comment': 'resent'},
+            {'client_id': 'b', 'order_id': self.orders[1].pk, 'comment': 'new'},
+            {'client_id': 'b', 'order_id': self.orders[1].pk, 'comment': 'repeated in batch'},
+            {'client_id': 'c', 'order_id': self.foreign.pk, 'comment': 'not mine'},
+            {'client_id': 'd', 'order_id': self.orders[0].pk},
+            {'client_id': 'e', 'order_id': 2 ** 64, 'comment': 'overflow'},
+        ])
+        results = response.data['results']
+        self.assertEqual([(r['client_id'], r['status']) for r in results], [
+            ('a', 'duplicate'), ('b', 'created'), ('b', 'duplicate'), ('c', 'rejected'), ('d', 'rejected'),
+            ('e', 'rejected'),
+        ])
+        self.assertEqual(results[3]['errors'], {'order_id': ['Order not found.']})
+        self.assertIn('comment', results[4]['errors'])
+        self.assertIn('order_id', results[5]['errors'])
+        self.assertEqual(sorted(DeliveryComment.objects.values_list('client_id', 'comment')),
+                         [('a', 'first'), ('b', 'new')])
+
+    def test_comment_stored_first_by_a_concurrent_flush_is_a_duplicate(self):
+        bulk_create = DeliveryComment.objects.bulk_create
+
+        def racing_bulk_create(rows, **kwargs):
+            DeliveryComment.objects.create(order=self.orders[0], partner=self.partner, comment='x', client_id='a')
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(DeliveryComment.objects, 'bulk_create', racing_bulk_create):
+            response = self.flush([{'client_id': 'a', 'order_id': self.orders[0].pk, 'comment': 'x'},
+                                   {'client_id': 'b', 'order_id': self.orders[1].pk, 'comment': 'y'}])
+        self.assertEqual([r['status'] for r in response.data['results']], ['duplicate', 'created'])
+        self.assertEqual(DeliveryComment.objects.count(), 2)
+
+    def test_batch_limit_and_role(self):
+        with override_settings(DELIVERY_COMMENT_BATCH_MAX=2):
+            response = self.flush([{'client_id': str(i), 'order_id': self.orders[0].pk, 'comment': 'x'}
+                                   for i in range(3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.flush([]).status_code, 400)
+        self.client.force_authenticate(CustomUser.objects.get(username='c'))
+        self.assertEqual(self.flush([{'client_id': 'x', 'order_id': self.foreign.pk, 'comment': 'x'}]).status_code, 403)
+
+
+class PizzaFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for name, description, price, kind, available in [
+            ('Margherita', 'Tomato, mozzarella and basil', '7.00', 'veg', True),
+            ('Pepperoni', 'Spicy salami and mozzarella', '10.00', 'non-veg', True),
+            ('Pumpkin Spice', 'Seasonal roasted pumpkin', '9.00', 'veg', False),
+        ]:
+            Pizza.objects.create(name=name, description=description, price=price, type=kind, is_available=available)
+
+    def names(self, **params):
+        response = self.client.get('/api/pizzas/', params)
+        self.assertEqual(response.status_code, 200)
+        return [p['name'] for p in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.names(), ['Margherita', 'Pepperoni'])
+        self.assertEqual(self.names(type='veg'), ['Margherita'])
+        self.assertEqual(self.names(is_available='false'), ['Pumpkin Spice'])
+        self.assertEqual(self.names(min_price='8', max_price='10'), ['Pepperoni'])
+        self.assertEqual(self.client.get('/api/pizzas/', {'min_price': '9', 'max_price': '8'}).status_code, 400)
+
+    def test_full_text_search_follows_writes(self):
+        self.assertEqual(self.names(search='mozzarella'), ['Margherita', 'Pepperoni'])
+        self.assertEqual(self.names(search='spicy salam'), ['Pepperoni'])
+        self.assertEqual(self.names(search='"OR*('), [])
+        Pizza.objects.filter(name='Margherita').update(description='Tomato and basil')
+        Pizza.objects.get(name='Pepperoni').delete()
+        cache.clear()
+        self.assertEqual(self.names(search='mozzarella'), [])
+        self.assertEqual(self.names(search='basil'), ['Margherita'])
+
+
+class PasswordPoolTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='rush', role='customer')
+        self.user.password = make_password('slice-of-life', hasher='pbkdf2_sha256')
+        self.user.save()
+
+    def login(self):
+        return self.client.post('/api/login/', {'username': 'rush', 'password': 'slice-of-life'}, format='json')
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher',
+                                         'django.contrib.auth.hashers.PBKDF2PasswordHasher'])
+    def test_login_rehashes_with_preferred_hasher(self):
+        version = self.user.token_version
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+        # Same password, new hash: other sessions stay signed in.
+        self.assertEqual(self.user.token_version, version)
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_password_change_still_revokes_tokens(self):
+        version = self.user.token_version
+        self.user.set_password('new-slice')
+        self.user.save()
+        self.assertEqual(self.user.token_version, version + 1)
+
+    def test_full_pool_sheds_load_with_503(self):
+        pool = passwords.HashPool(workers=1, max_pending=0, timeout=0)
+        pool.slots.acquire()
+        with mock.patch.object(passwords, '_pool', pool):
+            response = self.login()
+        pool.shutdown()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttling.get_store().clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='hammer', password='x', role='customer')
+        self.pizza = Pizza.objects.create(name='Margherita', description='', price='5.00', type='veg')
+
+    def tearDown(self):
+        throttling.get_store().clear()
+
+    def test_login_is_limited_per_ip_with_retry_after(self):
+        with mock.patch.object(throttling.LoginThrottle, 'rate', '2/min', create=True):
+            statuses = [self.client.post('/api/login/', {'username': 'nobody', 'password': 'x'}).status_code
+                        for _ in range(3)]
+            other_ip = self.client.post('/api/login/', {'username': 'nobody', 'password': 'x'},
+                                        REMOTE_ADDR='10.0.0.9')
+            response = self.client.post('/api/login/', {'username': 'nobody', 'password': 'x'})
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(other_ip.status_code, 401)
+        self.assertTrue(0 < int(response['Retry-After']) <= 30)
+
+    def test_cart_mutations_throttled_reads_not(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(throttling.CartThrottle, 'rate', '1/min', create=True):
+            first = self.client.post('/api/cart/', {'pizza_id': self.pizza.id})
+            second = self.client.post('/api/cart/', {'pizza_id': self.pizza.id})
+            read = self.client.get('/api/cart/')
+        self.assertEqual((first.status_code, second.status_code, read.status_code), (200, 429, 200))
+
+    def test_bucket_refills_over_time(self):
+        with mock.patch.object(throttling.AnonMenuThrottle, 'rate', '2/s', create=True), \
+                mock.patch('core.throttling.time.monotonic') as clock:
+            clock.return_value = 1000.0
+            statuses = [self.client.get('/api/pizzas/').status_code for _ in range(3)]
+            clock.return_value = 1000.5
+            refilled = self.client.get('/api/pizzas/').status_code
+            self.client.force_authenticate(self.user)
+            signed_in = self.client.get('/api/pizzas/').status_code
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual((refilled, signed_in), (200, 200))
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttling.get_store().clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='cust1', password='pass12345', role='customer')
+        for i in range(3):
+            Pizza.objects.create(name=f'Pizza {i}', description='', price='5.00', type='veg')
+        self.pizza = Pizza.objects.first()
+        order = Order.objects.create(user=self.user, status='preparing', total_price='10.00', payment_mode='cod')
+        OrderItem.objects.create(order=order, pizza=self.pizza, quantity=2, price='5.00')
+        token = self.client.post('/api/login/', {'username': 'cust1', 'password': 'pass12345'}).data['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        self.auth = {'authorization': 'Bearer ' + token}
+
+    def tearDown(self):
+        throttling.get_store().clear()
+
+    async def test_same_json_as_sync_views(self):
+        for path in ['/pizzas/?page_size=2', f'/pizzas/{self.pizza.pk}/', '/pizzas/999/',
+                     '/pizzas/?min_price=abc', '/cart/', '/orders/']:
+            expected = await sync_to_async(self.client.get)('/api' + path)
+            response = await self.async_client.get('/api/async' + path, headers=self.auth)
+            self.assertEqual(response.status_code, expected.status_code, path)
+            self.assertEqual(response.content.replace(b'/api/async/', b'/api/'), expected.content, path)
+
+    async def test_menu_cursor_and_cache(self):
+        first = json.loads((await self.async_client.get('/api/async/pizzas/', {'page_size': 2})).content)
+        second = await self.async_client.get(first['next'])
+        self.assertEqual([p['name'] for p in json.loads(second.content)['results']], ['Pizza 2'])
+        again = await self.async_client.get('/api/async/pizzas/', {'page_size': 2},
+                                             headers={'if-none-match': second['ETag']})
+        self.assertEqual(again.status_code, 200)
+        cached = await self.async_client.get(first['next'], headers={'if-none-match': second['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_authentication(self):
+        anonymous = await self.async_client.get('/api/async/orders/')
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous['WWW-Authenticate'], 'Bearer realm="api"')
+        await sync_to_async(revoke_tokens)(self.user.pk)
+        revoked = await self.async_client.get('/api/async/cart/', headers=self.auth)
+        self.assertEqual(revoked.status_code, 401)
+        self.assertEqual((await self.async_client.post('/api/async/pizzas/')).status_code, 405)
+
+
+class FastJSONTests(TestCase):
+    payload = {
+        'price': Decimal('8.50'),
+        'created_at': timezone.now(),
+        'day': timezone.now().date(),
+        'id': uuid.uuid4(),
+        'note': 'caf\u00e9 \u2028 line',
+        'avg_rating': 4.33,
+        'huge': 2 ** 70,
+        'items': [(1, 2), None, True],
+    }
+
+    def test_renders_same_bytes_as_drf(self):
+        self.assertEqual(fast_json.FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+        with mock.patch.object(fast_json, 'orjson', None):
+            self.assertEqual(fast_json.FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_parses_like_drf(self):
+        for raw in [b'{"quantity": 2, "note": "\\u00e9", "lone": "\\ud800"}', b'{"pizza_id": ', b'NaN']:
+            try:
+                expected = JSONParser().parse(BytesIO(raw))
+            except ParseError as exc:
+                with self.assertRaisesMessage(ParseError, str(exc.detail)):
+                    fast_json.FastJSONParser().parse(BytesIO(raw))
+            else:
+                self.assertEqual(fast_json.FastJSONParser().parse(BytesIO(raw)), expected)
+
+    def test_api_uses_fast_renderer(self):
+        Pizza.objects.create(name='Margherita', description='', price='8.50', type='veg')
+        cache.clear()
+        with mock.patch.object(fast_json.FastJSONRenderer, 'render', autospec=True,
+                               side_effect=lambda self, *args: JSONRenderer.render(self, *args)) as render:
+            response = APIClient().get('/api/pizzas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(render.called)
+
+
+class FlatSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='cust1', password='x', role='customer')
+        partner = CustomUser.objects.create_user(username='partner1', password='x', role='delivery_partner')
+        rated = Pizza.objects.create(name='Margherita', description='Classic', price='8.5', type='veg',
+                                     rating_count=3, rating_sum=13)
+        Pizza.objects.create(name='Pepperoni', description='', price='11.00', type='non-veg')
+        for i in range(3):
+            order = Order.objects.create(user=self.user, delivery_partner=partner if i else None,
+                                         status='preparing', total_price='17.00', payment_mode='cod')
+            for _ in range(i):
+                OrderItem.objects.create(order=order, pizza=rated, quantity=2, price='8.50')
+
+    def assertSameJSON(self, serializer_class, queryset):
+        flat = FlatSerializer.for_serializer(serializer_class)
+        self.assertEqual(JSONRenderer().render(flat.serialize(flat.rows(queryset))),
+                         JSONRenderer().render(serializer_class(queryset, many=True).data))
+
+    def test_matches_model_serializers(self):
+        self.assertSameJSON(PizzaSerializer, Pizza.objects.order_by('id'))
+        self.assertSameJSON(OrderSerializer, Order.objects.prefetch_related('items').order_by('id'))
+
+    def test_order_list_is_two_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(2):
+            response = client.get('/api/orders/', {'page_size': 2})
+        self.assertEqual([len(o['items']) for o in response.data['results']], [2, 1])
+        older = client.get(response.data['next']).data['results']
+        self.assertEqual([len(o['items']) for o in older], [0])
+
+    def test_unsupported_field_is_rejected(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'CartItemSerializer.pizza'):
+            FlatSerializer(CartSerializer)
+
+    def test_method_field_reading_a_relation_is_rejected(self):
+        class OrderUserSerializer(OrderSerializer):
+            username = serializers.SerializerMethodField()
+
+            class Meta(OrderSerializer.Meta):
+                fields = ['id', 'username']
+
+            def get_username(self, obj):
+                return obj.user.username
+
+        flat = FlatSerializer(OrderUserSerializer)
+        with self.assertRaisesMessage(ImproperlyConfigured, 'OrderUserSerializer.get_username'):
+            flat.serialize(flat.rows(Order.objects.all()))
+
+    def test_benchmark_command_output_matches(self):
+        out = StringIO()
+        call_command('serializer_benchmark', '--sizes', '2', '--repeat', '1', stdout=out)
+        lines = out.getvalue().splitlines()[1:]
+        self.assertEqual([line.split()[0] for line in lines], ['menu', 'orders'])
+        self.assertTrue(all(line.endswith('yes') for line in lines), out.getvalue())
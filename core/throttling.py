@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+_store = None
+
+
+def _refill(state, capacity, rate, now):
+    tokens, stamp = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), None
+    return (tokens, now), (1 - tokens) / rate
+
+
+class LocalBucketStore:
+    """
+    Token buckets in process memory: a dict lookup and a little arithmetic
+    under a lock per request. Each process keeps its own buckets, so with N
+    workers a client can get up to N times the rate. The least recently used
+    buckets are dropped beyond ``max_keys``.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        with self.lock:
+            state, wait = _refill(self.buckets.get(key), capacity, rate, time.monotonic())
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Token buckets in a Django cache shared by every worker (e.g. Redis). One
+    get and one set per request; the read-modify-write is not atomic, so under
+    heavy concurrency on a single key a few extra requests can slip through.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, rate):
+        state, wait = _refill(self.cache.get(key), capacity, rate, time.time())
+        # A bucket left alone long enough to refill is the same as no bucket.
+        self.cache.set(key, state, timeout=math.ceil(capacity / rate) + 1)
+        return wait
+
+    def clear(self):
+        pass
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if getattr(settings, 'THROTTLE_STORE', 'local') == 'cache':
+            _store = CacheBucketStore(getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default'))
+        else:
+            _store = LocalBucketStore()
+    return _store
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    ``SimpleRateThrottle`` with a token bucket instead of a request log: the
+    scope's ``DEFAULT_THROTTLE_RATES`` entry "N/period" allows bursts of N
+    and refills N tokens per period. A rate of None turns the scope off.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self._wait = get_store().take(self.key, self.num_requests, self.num_requests / self.duration)
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+    def user_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.id}'
+        return None
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Login attempts per client IP."""
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class CartThrottle(TokenBucketThrottle):
+    """Cart mutations per user; reading the cart is not limited."""
+    scope = 'cart'
+
+    def get_cache_key(self, request, view):
+        ident = self.user_ident(request)
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class CheckoutThrottle(TokenBucketThrottle):
+    """Checkouts per user."""
+    scope = 'checkout'
+
+    def get_cache_key(self, request, view):
+        ident = self.user_ident(request)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AnonMenuThrottle(TokenBucketThrottle):
+    """Anonymous menu reads per client IP; signed-in users are not limited."""
+    scope = 'menu_anon'
+
+    def get_cache_key(self, request, view):
+        if request.method not in ('GET', 'HEAD') or self.user_ident(request) is not None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
@@ -2,7 +2,16 @@ from django.urls import path
 from .views import RegisterView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.routers import DefaultRouter
-from .views import PizzaViewSet
+from .views import PizzaViewSet, OrderListView, RatingView
+from .events import order_events, partner_events
+from . import async_views
+from .cart import CartView, CartBulkAddView
+from .checkout import CheckoutView
+from .delivery_comments import DeliveryCommentBatchView
+from .export import OrderExportView
+from .order_status import OrderStatusUpdateView
+from .rollups import SalesAnalyticsView
+from .throttling import LoginThrottle
 
 router = DefaultRouter()
 router.register(r'pizzas', PizzaViewSet, basename='pizza')
@@ -12,7 +21,22 @@ router.register(r'pizzas', PizzaViewSet, basename='pizza')
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('login/', TokenObtainPairView.as_view(throttle_classes=[LoginThrottle]), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('cart/', CartView.as_view(), name='cart'),
+    path('cart/items/', CartBulkAddView.as_view(), name='cart-items'),
+    path('checkout/', CheckoutView.as_view(), name='checkout'),
+    path('orders/', OrderListView.as_view(), name='orders'),
+    path('orders/export/', OrderExportView.as_view(), name='order-export'),
+    path('orders/<int:pk>/update-status/', OrderStatusUpdateView.as_view(), name='order-update-status'),
+    path('orders/<int:order_id>/events/', order_events, name='order-events'),
+    path('partner/events/', partner_events, name='partner-events'),
+    path('delivery-comments/batch/', DeliveryCommentBatchView.as_view(), name='delivery-comment-batch'),
+    path('analytics/sales/', SalesAnalyticsView.as_view(), name='sales-analytics'),
+    path('rate-pizza/', RatingView.as_view(), name='rate-pizza'),
+    path('async/pizzas/', async_views.menu_list, name='async-pizza-list'),
+    path('async/pizzas/<int:pk>/', async_views.menu_detail, name='async-pizza-detail'),
+    path('async/cart/', async_views.cart_detail, name='async-cart'),
+    path('async/orders/', async_views.order_history, name='async-orders'),
 ]
 urlpatterns += router.urls
\ No newline at end of file
@@ -2,23 +2,97 @@ from django.shortcuts import render
 
 # Create your views here.
 from rest_framework import generics
+from rest_framework.response import Response
 from .models import CustomUser
 from .serializers import RegisterSerializer
 from rest_framework import viewsets, permissions
 from .models import Pizza
-from .serializers import PizzaSerializer
+from .serializers import PizzaFilterSerializer, PizzaSerializer
 from .permissions import IsAdminUser
+from . import menu_cache, search
+from .models import Order, Rating
+from .serializers import OrderSerializer, RatingSerializer
+from .pagination import MenuPagination, OrderPagination, RatingPagination
+from .throttling import AnonMenuThrottle
+from .flat_serializers import FlatListMixin
 
-class PizzaViewSet(viewsets.ModelViewSet):
+def filter_menu(pizzas, query_params):
+    """Apply the menu list's ``PizzaFilterSerializer`` filters to ``pizzas``."""
+    params = PizzaFilterSerializer(data=query_params)
+    params.is_valid(raise_exception=True)
+    filters = params.validated_data
+    available = filters.get('is_available')
+    pizzas = pizzas.filter(is_available=True if available is None else available)
+    if filters.get('type'):
+        pizzas = pizzas.filter(type=filters['type'])
+    if filters.get('min_price') is not None:
+        pizzas = pizzas.filter(price__gte=filters['min_price'])
+    if filters.get('max_price') is not None:
+        pizzas = pizzas.filter(price__lte=filters['max_price'])
+    if filters.get('search'):
+        pizzas = search.search(pizzas, filters['search'])
+    return pizzas
+
+
+class PizzaViewSet(FlatListMixin, viewsets.ModelViewSet):
     queryset = Pizza.objects.all()
     serializer_class = PizzaSerializer
+    query_budget = 4
+    pagination_class = MenuPagination
+    throttle_classes = [AnonMenuThrottle]
 
     def get_permissions(self):
         if self.request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
             return [IsAdminUser()]
         return [permissions.AllowAny()]
 
+    def get_queryset(self):
+        pizzas = super().get_queryset()
+        if self.action != 'list':
+            return pizzas
+        return filter_menu(pizzas, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        # Served from the menu cache while the menu version is unchanged, so a
+        # warm hit issues no SQL at all.
+        key, entry = menu_cache.get_entry(request)
+        if entry is None:
+            data = super().list(request, *args, **kwargs).data
+            entry = menu_cache.store_entry(key, data)
+        return menu_cache.finalize(request, Response(entry['data']), entry)
+
 
 class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = RegisterSerializer
+
+
+class OrderListView(FlatListMixin, generics.ListAPIView):
+    serializer_class = OrderSerializer
+    query_budget = 3
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OrderPagination
+
+    def get_queryset(self):
+        return Order.objects.filter(user_id=self.request.user.id).prefetch_related('items')
+
+
+class RatingView(FlatListMixin, generics.ListCreateAPIView):
+    serializer_class = RatingSerializer
+    query_budget = 3
+    pagination_class = RatingPagination
+
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [permissions.IsAuthenticated()]
+        return [permissions.AllowAny()]
+
+    def get_queryset(self):
+        ratings = Rating.objects.all()
+        pizza_id = self.request.query_params.get('pizza_id')
+        if pizza_id:
+            ratings = ratings.filter(pizza_id=pizza_id)
+        return ratings
+
+    def perform_create(self, serializer):
+        serializer.save(user_id=self.request.user.id)
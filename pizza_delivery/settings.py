@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,14 +45,56 @@ INSTALLED_APPS = [
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.StatelessRoleAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
          'rest_framework.permissions.AllowAny',
-    )
+    ),
+    # orjson-backed, byte-compatible with DRF's JSON classes (core.fast_json)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.fast_json.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.fast_json.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # Token buckets (core.throttling): "N/period" allows bursts of N and
+    # refills N per period. THROTTLING=off disables them, e.g. for
+    # manage.py loadtest runs where every virtual user shares one IP.
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'cart': '120/min',
+        'checkout': '20/min',
+        'menu_anon': '300/min',
+    },
+}
+if os.environ.get('THROTTLING', 'on') == 'off':
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = dict.fromkeys(REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'])
+# 'local' keeps buckets in process memory; 'cache' shares them through
+# THROTTLE_CACHE_ALIAS (use it with REDIS_URL and several workers).
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'local')
+THROTTLE_CACHE_ALIAS = 'default'
+# Upper bound for ?page_size= on paginated lists
+API_MAX_PAGE_SIZE = 100
+
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.RoleTokenObtainPairSerializer',
+    'TOKEN_USER_CLASS': 'core.authentication.RoleTokenUser',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.RoleTokenRefreshSerializer',
 }
+# Build request.user from token claims instead of loading CustomUser. Views
+# can still opt into the DB lookup with db_user_lookup = True.
+JWT_STATELESS_AUTH = True
+# Seconds a token version stays cached. Revocations reach other workers
+# within this window unless REDIS_URL gives them a shared cache.
+TOKEN_VERSION_CACHE_TIMEOUT = 30
 
 MIDDLEWARE = [
+    'core.middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +104,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query count / DB / serializer timing (core.middleware), on with
+# REQUEST_INSTRUMENTATION=on. Off means the middleware is removed from the
+# chain entirely (and test runs stay quiet).
+REQUEST_INSTRUMENTATION = os.environ.get('REQUEST_INSTRUMENTATION', 'off') == 'on'
+# Same SQL shape this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = 3
+# Raise instead of logging when a view exceeds its query_budget
+QUERY_BUDGET_RAISE = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.requests': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'pizza_delivery.urls'
 
 TEMPLATES = [
@@ -91,6 +154,66 @@ DATABASES = {
     }
 }
 
+# Tuned SQLite profile, opt-in with SQLITE_PROFILE=tuned. WAL is written into
+# the database file itself, so turning it on by default would rewrite the
+# checked-in dev db.sqlite3 (and leave -wal/-shm files) on any manage.py
+# command; use it on a deployment's own database. WAL lets readers
+# run alongside the single writer; BEGIN IMMEDIATE takes the write lock when a
+# transaction starts, so concurrent checkouts queue on busy_timeout instead of
+# failing with "database is locked" when a read lock can't be upgraded.
+# The tradeoff: every atomic() block becomes a writer, read-only ones too, and
+# queues behind other writers. Reads outside atomic() (autocommit: list,
+# export and analytics endpoints) never BEGIN and are unaffected, so keep
+# atomic() for write paths; a read that needs a consistent snapshot across
+# statements can still use one, at the cost of waiting for the write lock.
+# Compare with: python manage.py sqlite_benchmark
+SQLITE_TUNED_OPTIONS = {
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA busy_timeout=10000',
+        'PRAGMA cache_size=-65536',  # KiB, i.e. 64 MiB per connection
+        'PRAGMA mmap_size=268435456',
+        'PRAGMA temp_store=MEMORY',
+    ]),
+    'transaction_mode': 'IMMEDIATE',
+}
+if os.environ.get('SQLITE_PROFILE', 'default') == 'tuned':
+    DATABASES['default']['OPTIONS'] = SQLITE_TUNED_OPTIONS
+
+
+# Cache
+# Local memory by default; set REDIS_URL to share the menu cache (and anything
+# else stored in it) between worker processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pizza-delivery',
+    }
+}
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Order status pub/sub behind the SSE streams. In-process unless REDIS_URL
+# is set, in which case events reach subscribers in every worker.
+ORDER_EVENTS_BACKEND = 'core.events.InProcessBroker'
+if os.environ.get('REDIS_URL'):
+    REDIS_URL = os.environ['REDIS_URL']
+    ORDER_EVENTS_BACKEND = 'core.events.RedisBroker'
+SSE_HEARTBEAT_SECONDS = 15
+
+# Serialized /api/pizzas/ responses, keyed by menu version
+MENU_CACHE_ALIAS = 'default'
+MENU_CACHE_TIMEOUT = 300
+
+# Delivery partner dispatcher (core.dispatch)
+DISPATCH_POLICY = 'least-loaded'
+DISPATCH_PARTNER_CAPACITY = 1
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -110,6 +233,34 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. The first hasher of the active profile hashes new
+# passwords; the rest still verify older hashes, which are upgraded on the
+# next successful login. argon2 needs the argon2-cffi package.
+_HASHERS = {
+    name: f'django.contrib.auth.hashers.{cls}'
+    for name, cls in [
+        ('pbkdf2', 'PBKDF2PasswordHasher'), ('pbkdf2_sha1', 'PBKDF2SHA1PasswordHasher'),
+        ('argon2', 'Argon2PasswordHasher'), ('bcrypt', 'BCryptSHA256PasswordHasher'),
+        ('scrypt', 'ScryptPasswordHasher'),
+    ]
+}
+PASSWORD_HASHER_PROFILES = {
+    # Django's default order
+    'pbkdf2': [_HASHERS[n] for n in ('pbkdf2', 'pbkdf2_sha1', 'argon2', 'bcrypt', 'scrypt')],
+    'scrypt': [_HASHERS[n] for n in ('scrypt', 'pbkdf2', 'pbkdf2_sha1', 'argon2', 'bcrypt')],
+    'argon2': [_HASHERS[n] for n in ('argon2', 'scrypt', 'pbkdf2', 'pbkdf2_sha1', 'bcrypt')],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')]
+
+# Login and registration hash on a bounded pool (core.passwords): at most
+# HASH_POOL_WORKERS hashes run at once and HASH_POOL_MAX_PENDING more may
+# wait up to HASH_POOL_TIMEOUT seconds before getting a 503.
+# Compare hashers and pool sizes with: python manage.py password_benchmark
+AUTHENTICATION_BACKENDS = ['core.passwords.PooledModelBackend']
+HASH_POOL_WORKERS = os.cpu_count() or 2
+HASH_POOL_MAX_PENDING = 4 * HASH_POOL_WORKERS
+HASH_POOL_TIMEOUT = 2.0
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/